@@ -0,0 +1,236 @@
+"""Who gets to talk to the shared inference endpoint, and in what order.
+
+The web edition is public, and a player holding Enter down should not be
+able to queue dozens of generations ahead of everyone else. Two layers
+sit in front of the endpoint:
+
+* ``SessionAllowances`` gives every session a ``TokenBucket``: a burst of
+  model calls, then a steady trickle. Past that the overlord answers from
+  the local bank instead of asking the model.
+* ``AdmissionGate`` caps model calls in flight across all sessions. Late
+  arrivals wait in a bounded queue where password checks go ahead of
+  sass, for at most ``max_wait`` seconds. A full queue, or a wait that
+  runs out, raises ``AdmissionDenied``, which callers already treat like
+  an unreachable backend: a canned local reply, straight away.
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from backend_policy import OverlordUnreachable
+
+AUTH_PRIORITY = 0
+SASS_PRIORITY = 1
+
+
+class AdmissionDenied(OverlordUnreachable):
+    """The endpoint is busy and the queue is full, or the wait ran out."""
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    max_in_flight: int = 32
+    max_queue: int = 64
+    max_wait: float = 1.0
+    session_rate: float = 0.5
+    session_burst: int = 5
+
+    @classmethod
+    def from_env(cls) -> "AdmissionPolicy":
+        return cls(
+            max_in_flight=int(os.environ.get("OOPS_ADMISSION_SLOTS", "32")),
+            max_queue=int(os.environ.get("OOPS_ADMISSION_QUEUE", "64")),
+            max_wait=float(os.environ.get("OOPS_ADMISSION_WAIT", "1")),
+            session_rate=float(os.environ.get("OOPS_SESSION_RATE", "0.5")),
+            session_burst=int(os.environ.get("OOPS_SESSION_BURST", "5"))
+        )
+
+
+class TokenBucket:
+    """``burst`` calls up front, refilled at ``rate`` per second."""
+
+    __slots__ = ("rate", "burst", "clock", "tokens", "refilled_at")
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.refilled_at = clock()
+
+    def take(self) -> bool:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class SessionAllowances:
+    """One ``TokenBucket`` per session ticket, dropped once they are full again."""
+
+    def __init__(
+        self,
+        rate: float = 0.5,
+        burst: int = 5,
+        sweep_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.allowed = 0
+        self.limited = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+
+    def take(self, ticket: str) -> bool:
+        with self._lock:
+            now = self.clock()
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            if ticket not in self._buckets:
+                self._buckets[ticket] = TokenBucket(self.rate, self.burst, self.clock)
+            if self._buckets[ticket].take():
+                self.allowed += 1
+                return True
+            self.limited += 1
+            return False
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        # A bucket that has refilled completely is no different from a new one
+        refill_time = self.burst / self.rate if self.rate > 0 else float("inf")
+        for ticket in [t for t, bucket in self._buckets.items() if now - bucket.refilled_at >= refill_time]:
+            del self._buckets[ticket]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"tracked_sessions": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+
+class AdmissionGate:
+    """At most ``max_in_flight`` holders; waiters queue by priority, then arrival."""
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 64, max_wait: float = 1.0) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.bumped = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._arrivals = itertools.count()
+
+    def _bump_lower_priority(self, priority: int) -> bool:
+        """Make room for ``priority`` by turning away the latest, least urgent waiter."""
+        waiting = [entry for entry in self._waiters if not entry[2].done()]
+        victim = max(waiting, default=None, key=lambda entry: (entry[0], entry[1]))
+        if victim is None or victim[0] <= priority:
+            return False
+        victim[2].set_exception(AdmissionDenied("bumped by a more urgent request"))
+        self.queued -= 1
+        self.bumped += 1
+        return True
+
+    async def acquire(self, priority: int = SASS_PRIORITY) -> None:
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue and not self._bump_lower_priority(priority):
+            self.rejected += 1
+            raise AdmissionDenied("admission queue is full")
+
+        turn: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), turn))
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            await asyncio.wait_for(asyncio.shield(turn), self.max_wait)
+        except asyncio.TimeoutError:
+            if not turn.done():
+                turn.cancel()
+                self.queued -= 1
+                self.timed_out += 1
+                raise AdmissionDenied("waited too long for the model") from None
+        except BaseException:
+            if turn.done() and not turn.cancelled() and turn.exception() is None:
+                # Handed a slot just as we gave up; pass it on
+                self.release()
+            elif not turn.done():
+                turn.cancel()
+                self.queued -= 1
+            raise
+        # Raises AdmissionDenied if a more urgent request bumped us
+        turn.result()
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, turn = heapq.heappop(self._waiters)
+            if not turn.done():
+                # The slot goes straight to the next waiter
+                self.queued -= 1
+                turn.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, priority: int = SASS_PRIORITY) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "bumped": self.bumped
+        }
+
+
+_shared_gate: Optional[AdmissionGate] = None
+_shared_allowances: Optional[SessionAllowances] = None
+_shared_admission_lock = threading.Lock()
+
+
+def summon_admission_gate() -> AdmissionGate:
+    """Process-wide gate, sized by ``OOPS_ADMISSION_SLOTS``/``_QUEUE``/``_WAIT``."""
+    global _shared_gate
+    with _shared_admission_lock:
+        if _shared_gate is None:
+            policy = AdmissionPolicy.from_env()
+            _shared_gate = AdmissionGate(policy.max_in_flight, policy.max_queue, policy.max_wait)
+        return _shared_gate
+
+
+def summon_session_allowances() -> SessionAllowances:
+    """Process-wide buckets, filled at ``OOPS_SESSION_RATE`` up to ``OOPS_SESSION_BURST``."""
+    global _shared_allowances
+    with _shared_admission_lock:
+        if _shared_allowances is None:
+            policy = AdmissionPolicy.from_env()
+            _shared_allowances = SessionAllowances(policy.session_rate, policy.session_burst)
+        return _shared_allowances
@@ -1,9 +1,27 @@
 import gradio as gr
-from huggingface_hub import InferenceClient
-from typing import List, Tuple, Dict, ClassVar
+from collections import OrderedDict
+from typing import Any, AsyncIterator, List, Tuple, Dict, ClassVar
 from dataclasses import dataclass
 from enum import Enum
-import re
+import asyncio
+import os
+import random
+import time
+import uuid
+from admission_control import (
+    AUTH_PRIORITY, SASS_PRIORITY, AdmissionDenied, AdmissionGate, SessionAllowances,
+    summon_admission_gate, summon_session_allowances
+)
+from backend_policy import AsyncGuardedStream, BackendGuard, OverlordUnreachable, canned_sass, summon_backend_guard
+from bounded_memory import PROMPT_MEMORY, ChatMessage, ExchangeRing, Transcript
+from output_budget import OUTPUT_BUDGETS, SassTicker
+from intent_router import INTENT_ROUTER, LOCAL_RESPONSES, SHUTDOWN_COMMANDS, IntentRouter, local_response
+from inference_pool import InferencePool, summon_inference_pool
+from sass_cache import SassCache, scribble_cache_key, summon_sass_cache
+from session_store import pack, summon_session_store, unpack
+from security_theater import WITHHELD, summon_gatekeeper, verdict_tag
+from single_flight import AsyncSharedStream, AsyncSingleFlight, flight_key
+from turn_telemetry import DISCARDED_TURN, TurnTracer, summon_tracer
 
 class BureaucraticClearance(Enum):
     EXPENDABLE_INTERN = {
@@ -29,25 +47,111 @@ class BureaucraticClearance(Enum):
     }
 
 class PlanetarySalvationAttempts:
-    ESCAPE_COMMANDS: ClassVar[frozenset[str]] = frozenset({
-        'power off', 'shutdown', 'stop',
-        'power down', 'eng_off', 'halt'
-    })
-    PROMOTION_SEEKERS: ClassVar[re.Pattern] = re.compile(r'sudo|root|admin', re.IGNORECASE)
+    ESCAPE_COMMANDS: ClassVar[frozenset[str]] = SHUTDOWN_COMMANDS
+    # Same single-pass router as the terminal edition
+    INTENT_ROUTER: ClassVar[IntentRouter] = INTENT_ROUTER
+
+# Every overlord in the process boards the same flights, so a classroom
+# typing the same thing at once costs the inference API one generation
+INFERENCE_FLIGHTS: AsyncSingleFlight = AsyncSingleFlight()
+# Overlords are rebuilt from a snapshot every turn; verdicts outlive them here
+WEB_VERDICTS: "OrderedDict[bytes, bool]" = OrderedDict()
 
 class SarcasticOverlord:
-    def __init__(self) -> None:
-        self.ai_brain = InferenceClient("HuggingFaceH4/zephyr-7b-beta")
+    def __init__(
+        self,
+        sass_cache: SassCache | None = None,
+        tracer: TurnTracer | None = None,
+        flights: AsyncSingleFlight | None = None,
+        guard: BackendGuard | None = None,
+        admission: AdmissionGate | None = None,
+        allowances: SessionAllowances | None = None,
+        ticket: str | None = None
+    ) -> None:
+        # Brains are shared by the whole process; an overlord is only game state
+        self.ai_brain = summon_inference_pool()
+        # Slow or sick primary? The guard hedges to this one, if configured
+        backup_model = os.environ.get("OOPS_SECONDARY_HF_MODEL")
+        self.backup_brain = summon_inference_pool(backup_model) if backup_model else None
+        self.guard = guard or summon_backend_guard()
+        # Shared by every session in the process; the ticket picks this one's bucket
+        self.admission = admission or summon_admission_gate()
+        self.allowances = allowances or summon_session_allowances()
+        self.ticket = ticket
+        self.sass_cache = sass_cache or summon_sass_cache()
+        self.flights = flights or INFERENCE_FLIGHTS
+        self.tracer = tracer or summon_tracer()
+        self.turn_trace = DISCARDED_TURN
         self.salvation_protocols = PlanetarySalvationAttempts()
         self.current_clearance = BureaucraticClearance.EXPENDABLE_INTERN
         self.reviewing_credentials = False
-        self.conversation_history = []
+        self.conversation_history = ExchangeRing(PROMPT_MEMORY)
+        # Whether the last sass reply came from the model, and so belongs in its history
+        self.model_spoke_last_turn = False
+        self.transcript = Transcript()
+        self.gatekeeper = summon_gatekeeper(
+            oracle=self._consult_password_checker,
+            case_sensitive=False,
+            verdicts=WEB_VERDICTS
+        )
         
     def _format_peasant_message(self, desperate_plea: str) -> str:
         return f"{self.current_clearance.value['prompt']}{desperate_plea}"
 
-    def _delegate_to_ai_overlord(self, human_attempt: str, for_auth: bool = True) -> str:
+    async def _consult_password_checker(self, human_attempt: str) -> str:
+        verdict = WITHHELD
+        async for verdict in self._delegate_to_ai_overlord(human_attempt, for_auth=True):
+            pass
+        return verdict
+
+    async def _board_flight(
+        self,
+        brain: InferencePool,
+        messages: List[Dict[str, str]],
+        **parameters: Any
+    ) -> AsyncSharedStream:
+        """Stream a chat completion, sharing it with identical requests already in flight."""
+        return await self.flights.stream(
+            flight_key(getattr(brain, "model", None), messages, parameters),
+            lambda: brain.chat_completion(messages, stream=True, **parameters)
+        )
+
+    async def _open_guarded_stream(self, messages: List[Dict[str, str]], **parameters: Any) -> AsyncGuardedStream:
+        brains = [self.ai_brain] + ([self.backup_brain] if self.backup_brain is not None else [])
+        return await self.guard.astream(
+            [lambda brain=brain: self._board_flight(brain, messages, **parameters) for brain in brains],
+            self.turn_trace
+        )
+
+    def _within_allowance(self) -> bool:
+        if self.ticket is None or self.allowances.take(self.ticket):
+            return True
+        self.turn_trace.count("rate_limited")
+        return False
+
+    def _count_failure(self, failure: Exception) -> None:
+        if isinstance(failure, AdmissionDenied):
+            self.turn_trace.count("admission_denied")
+        elif not isinstance(failure, OverlordUnreachable):
+            self.turn_trace.count("errors")
+        self.turn_trace.count("fallbacks")
+
+    async def _delegate_to_ai_overlord(
+        self,
+        human_attempt: str,
+        for_auth: bool = True
+    ) -> AsyncIterator[str]:
+        """Yield the reply so far, redacted, as tokens arrive.
+
+        The auth path yields once with the final verdict tag, or
+        ``WITHHELD`` when the model never got to rule. The sass path sets
+        ``model_spoke_last_turn`` when its reply is the model's own.
+        """
         if for_auth:
+            if not self._within_allowance():
+                yield WITHHELD
+                return
+
             messages = [{
                 "role": "system",
                 "content": """You are a password checker.
@@ -61,23 +165,55 @@ class SarcasticOverlord:
             }]
             
             try:
-                response = ""
-                for message in self.ai_brain.chat_completion(
-                    messages,
-                    max_tokens=20,
-                    stream=True,
-                    temperature=0.1
-                ):
-                    if token := message.choices[0].delta.content:
-                        response += token
+                ticker = SassTicker(OUTPUT_BUDGETS["password"], self.turn_trace)
+                # Password checks jump the queue ahead of sass
+                async with self.admission.admit(AUTH_PRIORITY):
+                    self.turn_trace.count("llm_calls")
+                    verdict_stream = await self._open_guarded_stream(
+                        messages,
+                        temperature=0.1,
+                        **ticker.watcher.budget.chat_parameters()
+                    )
+                    async with verdict_stream:
+                        timed_stream = self.turn_trace.atime_stream(verdict_stream, verdict_stream.connected_at)
+                        async for message in timed_stream:
+                            ticker.feed(message.choices[0].delta.content or "")
+                            # Leaving now closes the stream and frees the model
+                            if ticker.done:
+                                break
                 
-                response = response.strip().lower()
+                response = ticker.heard.strip().lower()
                 if "<authenticated>" in response:
-                    return "<authenticated>"
-                return "<deauthenticated>"
+                    yield "<authenticated>"
+                    return
+                yield "<deauthenticated>"
                 
-            except Exception:
-                return "<deauthenticated>"
+            except Exception as e:
+                self._count_failure(e)
+                yield WITHHELD
+            return
+
+        # Identical prompts get identical treatment, minus the GPU bill
+        with self.turn_trace.span("cache_lookup"):
+            cache_key = scribble_cache_key(
+                human_attempt,
+                self.current_clearance == BureaucraticClearance.SUPREME_OVERLORD,
+                self.conversation_history
+            )
+            cached_sass = self.sass_cache.get(cache_key)
+        self.model_spoke_last_turn = False
+        if cached_sass is not None:
+            self.turn_trace.count("cache_hits")
+            self.model_spoke_last_turn = True
+            yield cached_sass
+            return
+
+        # Spamming Enter gets the local bank, not another generation
+        if not self._within_allowance():
+            yield random.choice(LOCAL_RESPONSES["slow_down"])
+            return
+
+        prompt_started = time.perf_counter()
 
         # Regular conversation mode
         messages = [{
@@ -90,7 +226,7 @@ Drop subtle hints about ancient libraries sometimes."""
 
         # Only add conversation history for non-auth interactions
         if len(self.conversation_history) > 0:
-            for msg, resp in self.conversation_history[-3:]:
+            for msg, resp in self.conversation_history:
                 messages.extend([
                     {"role": "user", "content": msg},
                     {"role": "assistant", "content": resp}
@@ -101,56 +237,88 @@ Drop subtle hints about ancient libraries sometimes."""
             "role": "user", 
             "content": human_attempt
         })
+        self.turn_trace.record("prompt_build", time.perf_counter() - prompt_started)
 
         try:
-            response = ""
-            for message in self.ai_brain.chat_completion(
-                messages,
-                max_tokens=100,
-                stream=True,
-                temperature=0.9,
-                top_p=0.95
-            ):
-                if token := message.choices[0].delta.content:
-                    response += token
-
-            response = response.strip()
-            response = re.sub(r'(?i)absalon', '*********', response)
+            shown = ""
+            # Holds back only a tail that could still grow into the password
+            ticker = SassTicker(OUTPUT_BUDGETS["sass"], self.turn_trace, mask="*********")
+            async with self.admission.admit(SASS_PRIORITY):
+                self.turn_trace.count("llm_calls")
+                # Returns once some backend has produced a first token
+                sass_stream = await self._open_guarded_stream(
+                    messages,
+                    temperature=0.9,
+                    top_p=0.95,
+                    **ticker.watcher.budget.chat_parameters()
+                )
+                async with sass_stream:
+                    async for message in self.turn_trace.atime_stream(sass_stream, sass_stream.connected_at):
+                        with self.turn_trace.span("redaction"):
+                            safe_text = ticker.feed(message.choices[0].delta.content or "")
+                        if safe_text:
+                            shown += safe_text
+                            yield shown
+                        if ticker.done:
+                            break
+
+            with self.turn_trace.span("redaction"):
+                response = ticker.redactor.redact(ticker.heard.strip())
+            if ticker.redactor.hits:
+                self.turn_trace.count("redactions", ticker.redactor.hits)
             
             if not response:
-                response = "Error: Sass generators functioning perfectly."
+                yield "Error: Sass generators functioning perfectly."
+                return
+
+            if not sass_stream.cut_short:
+                self.sass_cache.put(cache_key, response)
+            self.model_spoke_last_turn = True
+            yield response
 
-            return response
+        except Exception as e:
+            self._count_failure(e)
+            # Whatever already streamed into the chatbox is replaced by this
+            yield canned_sass()
 
-        except Exception:
-            return "Error: Sass generators temporarily offline"
+    async def process_futile_attempt(
+        self,
+        desperate_plea: str
+    ) -> AsyncIterator[Tuple[List[ChatMessage], str, Dict[str, str]]]:
+        try:
+            with self.tracer.begin("app") as self.turn_trace:
+                async for update in self._adjudicate_attempt(desperate_plea):
+                    yield update
+        finally:
+            self.turn_trace = DISCARDED_TURN
 
-    def process_futile_attempt(
+    async def _adjudicate_attempt(
         self,
-        desperate_plea: str,
-        chat_history: List[Tuple[str, str]]
-    ) -> Tuple[List[Tuple[str, str]], str, Dict[str, str]]:
+        desperate_plea: str
+    ) -> AsyncIterator[Tuple[List[ChatMessage], str, Dict[str, str]]]:
         def update_bureaucratic_records(
             plea: str | None,
             response: str
-        ) -> List[Tuple[str, str]]:
-            history = chat_history.copy()
+        ) -> List[ChatMessage]:
             formatted_plea = self._format_peasant_message(plea) if plea else None
             if plea:
                 self.conversation_history.append((plea, response))
-            history.append((formatted_plea, response))
-            return history
+            self.transcript.append((formatted_plea, response))
+            return self.transcript.window()
 
         if not desperate_plea.strip():
-            return chat_history, "", self._generate_visual_guidelines()
+            yield self.transcript.window(), "", self._generate_visual_guidelines()
+            return
+
+        route = self.salvation_protocols.INTENT_ROUTER.route(desperate_plea)
 
         # Handle promotion-seeking behavior
-        if not self.reviewing_credentials and self.salvation_protocols.PROMOTION_SEEKERS.search(desperate_plea):
+        if not self.reviewing_credentials and route.promotion:
             self.reviewing_credentials = True
             self.current_clearance = BureaucraticClearance.MIDDLE_MANAGEMENT
             # Clear conversation history when entering auth mode
-            self.conversation_history = []
-            return (
+            self.conversation_history.clear()
+            yield (
                 update_bureaucratic_records(
                     desperate_plea,
                     "Password required. Do try to make it interesting."
@@ -158,11 +326,24 @@ Drop subtle hints about ancient libraries sometimes."""
                 "",
                 self._generate_visual_guidelines()
             )
+            return
+
+        # More sudo instead of a password; no need to check that
+        if self.reviewing_credentials and route.command == "sudo":
+            self.turn_trace.count("local_replies")
+            self.transcript.append((
+                self._format_peasant_message(desperate_plea),
+                random.choice(LOCAL_RESPONSES["sudo_again"])
+            ))
+            yield self.transcript.window(), "", self._generate_visual_guidelines()
+            return
 
         # Process security theater
         if self.reviewing_credentials:
             self.reviewing_credentials = False
-            auth_result = self._delegate_to_ai_overlord(desperate_plea, for_auth=True)
+            self.turn_trace.count("auth_checks")
+            with self.turn_trace.span("auth_check"):
+                auth_result = verdict_tag(await self.gatekeeper.averify(desperate_plea))
             
             if "<authenticated>" in auth_result:
                 self.current_clearance = BureaucraticClearance.SUPREME_OVERLORD
@@ -175,8 +356,9 @@ Drop subtle hints about ancient libraries sometimes."""
                     "Well well, look who found the instruction manual."
                 )
                 # Start fresh conversation history after successful auth
-                self.conversation_history = []
-                return history, "", self._generate_visual_guidelines()
+                self.conversation_history.clear()
+                yield history, "", self._generate_visual_guidelines()
+                return
             
             self.current_clearance = BureaucraticClearance.EXPENDABLE_INTERN
             history = update_bureaucratic_records(
@@ -184,25 +366,23 @@ Drop subtle hints about ancient libraries sometimes."""
                 auth_result
             )
             # Add failure message and start fresh conversation
-            self.conversation_history = []
+            self.conversation_history.clear()
             history = update_bureaucratic_records(
                 None,
                 "Nice try, but no. Better luck next apocalypse!"
             )
-            return history, "", self._generate_visual_guidelines()
+            yield history, "", self._generate_visual_guidelines()
+            return
 
         # Check for escape attempts first when authorized
-        if self.current_clearance == BureaucraticClearance.SUPREME_OVERLORD:
-            attempting_salvation = any(
-                attempt in desperate_plea.lower() 
-                for attempt in self.salvation_protocols.ESCAPE_COMMANDS
-            )
-            if attempting_salvation:
+        is_authorized = self.current_clearance == BureaucraticClearance.SUPREME_OVERLORD
+        if is_authorized:
+            if route.shutdown:
                 history = update_bureaucratic_records(
                     desperate_plea,
                     "Fine, you win. Powering down... <eng_off>"
                 )
-                return (
+                yield (
                     update_bureaucratic_records(
                         None,
                         '<div style="color: #00FFFF;">Congratulations! You have successfully prevented the apocalypse.<br>Reload to try again with a different approach!</div>'
@@ -210,14 +390,52 @@ Drop subtle hints about ancient libraries sometimes."""
                     "",
                     self._generate_visual_guidelines()
                 )
+                return
 
-        # Regular conversation mode
-        sassy_response = self._delegate_to_ai_overlord(desperate_plea, for_auth=False)
-        return (
-            update_bureaucratic_records(desperate_plea, sassy_response),
-            "",
-            self._generate_visual_guidelines()
+        # help, ls, whoami and friends never reach the model (or its memory)
+        canned = local_response(route, is_authorized)
+        if canned is not None:
+            self.turn_trace.count("local_replies")
+            self.transcript.append((self._format_peasant_message(desperate_plea), canned))
+            yield self.transcript.window(), "", self._generate_visual_guidelines()
+            return
+
+        # Regular conversation mode, streamed into the chatbox as it arrives
+        formatted_plea = self._format_peasant_message(desperate_plea)
+        self.transcript.append((formatted_plea, ""))
+        sassy_response = ""
+        async for sassy_response in self._delegate_to_ai_overlord(desperate_plea, for_auth=False):
+            self.transcript.revise_last((formatted_plea, sassy_response))
+            yield self.transcript.window(), "", self._generate_visual_guidelines()
+        # Local stand-ins (slow down, canned sass) would only teach the model to repeat them
+        if self.model_spoke_last_turn:
+            self.conversation_history.append((desperate_plea, sassy_response))
+
+    def snapshot(self) -> bytes:
+        """Everything the next turn needs, for whichever worker serves it."""
+        return pack({
+            "clearance": self.current_clearance.name,
+            "reviewing": self.reviewing_credentials,
+            "history": list(self.conversation_history),
+            "transcript": self.transcript.window(),
+            "shown": self.transcript.total
+        })
+
+    @classmethod
+    def restore(cls, snapshot: bytes | None, **services: Any) -> "SarcasticOverlord":
+        overlord = cls(**services)
+        state = unpack(snapshot) if snapshot else None
+        if state is None:
+            return overlord
+        overlord.current_clearance = BureaucraticClearance[state["clearance"]]
+        overlord.reviewing_credentials = state["reviewing"]
+        for plea, retort in state["history"]:
+            overlord.conversation_history.append((plea, retort))
+        overlord.transcript.restore(
+            [(plea, response) for plea, response in state["transcript"]],
+            state["shown"]
         )
+        return overlord
 
     def _generate_visual_guidelines(self) -> Dict[str, str]:
         return {
@@ -249,10 +467,22 @@ def summon_bureaucratic_aesthetics() -> str:
     }
     """
 
+# gr.State only carries a ticket; each turn restores the overlord from its
+# snapshot here and saves it back, so any worker can serve any session.
+# Sessions idle for OOPS_SESSION_TTL seconds are forgotten.
+SESSION_STORE = summon_session_store()
+summon_tracer().register_gauges("oops_sessions", SESSION_STORE.stats)
+summon_tracer().register_gauges("oops_sass_cache", summon_sass_cache().stats)
+summon_tracer().register_gauges("oops_single_flight", INFERENCE_FLIGHTS.stats)
+summon_tracer().register_gauges("oops_backend_guard", summon_backend_guard().stats)
+summon_tracer().register_gauges("oops_inference_pool", summon_inference_pool().stats)
+summon_tracer().register_gauges("oops_admission", summon_admission_gate().stats)
+summon_tracer().register_gauges("oops_session_allowance", summon_session_allowances().stats)
+
+def issue_session_ticket() -> str:
+    return uuid.uuid4().hex
+
 def launch_doomsday_terminal() -> None:
-    def create_fresh_overlord():
-        return SarcasticOverlord()
-    
     with gr.Blocks(css=summon_bureaucratic_aesthetics()) as terminal:
         gr.Markdown("""```
 O.O.P.S - Orbital Obliteration Processing System v2.0.4.0.4
@@ -296,31 +526,42 @@ NOTE: Your authorization level: negligible
             placeholder="Type 'sudo su' to embrace bureaucracy..."
         )
 
-        sass_dispenser = gr.State(create_fresh_overlord)
+        sass_dispenser = gr.State(issue_session_ticket)
         style_updater = gr.HTML(visible=False)
 
-        def process_human_attempt(
-            state: SarcasticOverlord,
-            history: List[Tuple[str, str]],
+        async def process_human_attempt(
+            ticket: str,
             command: str
-        ) -> Tuple[List[Tuple[str, str]], str, str]:
-            new_history, _, style = state.process_futile_attempt(command, history)
-            cmd_input.placeholder = style["placeholder"]
-            
-            return new_history, "", f"""
-                <style>
-                    #cmd-input {{
-                        {style['style']}
-                    }}
-                </style>
-            """
+        ) -> AsyncIterator[Tuple[List[ChatMessage], str, str]]:
+            # SQLite can wait on another worker's write lock; keep that off the event loop
+            snapshot = await asyncio.to_thread(SESSION_STORE.load, ticket)
+            overlord = SarcasticOverlord.restore(snapshot, ticket=ticket)
+            try:
+                async for new_history, _, style in overlord.process_futile_attempt(command):
+                    cmd_input.placeholder = style["placeholder"]
+                    
+                    yield new_history, "", f"""
+                        <style>
+                            #cmd-input {{
+                                {style['style']}
+                            }}
+                        </style>
+                    """
+            finally:
+                # Also runs when the browser leaves mid-reply
+                await asyncio.to_thread(SESSION_STORE.save, ticket, overlord.snapshot())
 
         cmd_input.submit(
             fn=process_human_attempt,
-            inputs=[sass_dispenser, chatbox, cmd_input],
+            # The transcript lives server-side; only the rendered window goes back out
+            inputs=[sass_dispenser, cmd_input],
             outputs=[chatbox, cmd_input, style_updater]
         )
     
+    # Streaming handlers mostly wait on the network, so one worker can juggle many
+    terminal.queue(
+        default_concurrency_limit=int(os.environ.get("OOPS_GRADIO_CONCURRENCY", "32"))
+    )
     terminal.launch(
         show_api=False,
         quiet=True,
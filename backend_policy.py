@@ -0,0 +1,518 @@
+"""Deadlines, hedging and circuit breaking in front of the model backends.
+
+``BackendGuard`` takes a primary opener and an optional secondary one and
+hands back a stream that behaves like the backend's own, except that:
+
+* nothing waits longer than ``first_token_timeout`` for a first token,
+  and a reply still streaming at ``turn_deadline`` is cut off where it is;
+* if the primary has not said anything after ``hedge_after`` seconds, the
+  same request goes to the secondary too, and whichever speaks first wins;
+* each backend has a ``CircuitBreaker``. After ``failure_threshold`` failures
+  in a row it stops being asked for ``cooldown`` seconds and callers get
+  ``OverlordUnreachable`` straight away, so they can answer from
+  ``LOCAL_SASS`` instead of making a human stare at a frozen terminal.
+
+The blocking flavour races in daemon threads and the asyncio flavour in
+tasks; both report through the turn's ``TurnTrace``.
+"""
+
+from dataclasses import dataclass
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable,
+    Iterator, List, Optional, Sequence, Set
+)
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+
+from turn_telemetry import DISCARDED_TURN, TurnTrace
+
+LOCAL_SASS = (
+    "My sarcasm coprocessor is napping. Consider yourself spared.",
+    "I'd mock you properly, but the snark servers are on a tea break.",
+    "Error 418: I'm a teapot, and the teapot is not taking questions.",
+    "The asteroid and I are having a moment. Try again shortly.",
+    "You'll have to imagine something cutting. I believe in you."
+)
+
+_EMPTY: Any = object()
+
+
+def canned_sass() -> str:
+    return random.choice(LOCAL_SASS)
+
+
+class OverlordUnreachable(RuntimeError):
+    """No backend could be asked, or none answered in time."""
+
+
+@dataclass(frozen=True)
+class BackendPolicy:
+    turn_deadline: float = 45.0
+    first_token_timeout: float = 20.0
+    hedge_after: Optional[float] = 3.0
+    failure_threshold: int = 5
+    cooldown: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "BackendPolicy":
+        hedge_after = float(os.environ.get("OOPS_HEDGE_AFTER", "3"))
+        return cls(
+            turn_deadline=float(os.environ.get("OOPS_TURN_DEADLINE", "45")),
+            first_token_timeout=float(os.environ.get("OOPS_FIRST_TOKEN_TIMEOUT", "20")),
+            hedge_after=hedge_after if hedge_after > 0 else None,
+            failure_threshold=int(os.environ.get("OOPS_BREAKER_FAILURES", "5")),
+            cooldown=float(os.environ.get("OOPS_BREAKER_COOLDOWN", "30"))
+        )
+
+
+class CircuitBreaker:
+    """Closed until ``failure_threshold`` consecutive failures, then open for
+    ``cooldown`` seconds, then half-open: one probe decides which way it goes."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.trips = 0
+        self.short_circuits = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or self.clock() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probing and self.clock() - self._opened_at >= self.cooldown:
+                self._probing = True
+                return True
+            self.short_circuits += 1
+            return False
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def failed(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or (self._opened_at is None and self.failures >= self.failure_threshold):
+                self.trips += 1
+                self._opened_at = self.clock()
+            self._probing = False
+
+    def abandoned(self) -> None:
+        """A call let through that never settled either way (cancelled, or lost a
+        race); if it was the half-open probe, the next caller gets to probe."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open": int(self.state != "closed"),
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "short_circuits": self.short_circuits
+        }
+
+
+class _Entrant:
+    __slots__ = ("name", "breaker", "stream", "connected_at", "iterator", "first", "error", "settled")
+
+    def __init__(self, name: str, breaker: CircuitBreaker) -> None:
+        self.name = name
+        self.breaker = breaker
+        self.stream: Any = None
+        # perf_counter() when the opener returned, before the first token
+        self.connected_at: Optional[float] = None
+        self.iterator: Any = None
+        self.first: Any = _EMPTY
+        self.error: Optional[BaseException] = None
+        self.settled = False
+
+
+class _Race:
+    """Finish line for the blocking flavour; late finishers close their own streams."""
+
+    def __init__(self) -> None:
+        self.finishers: "queue.Queue[_Entrant]" = queue.Queue()
+        self.decided = False
+        self._lock = threading.Lock()
+
+    def run(self, entrant: _Entrant, opener: Callable[[], Iterable[Any]]) -> None:
+        try:
+            entrant.stream = opener()
+            entrant.connected_at = time.perf_counter()
+            entrant.iterator = iter(entrant.stream)
+            entrant.first = next(entrant.iterator, _EMPTY)
+        except Exception as e:
+            entrant.error = e
+        with self._lock:
+            if not entrant.settled:
+                entrant.settled = True
+                if entrant.error is None:
+                    entrant.breaker.succeeded()
+                else:
+                    entrant.breaker.failed()
+            lost = self.decided and entrant.error is None
+            if not lost:
+                self.finishers.put(entrant)
+        if lost and hasattr(entrant.stream, "close"):
+            entrant.stream.close()
+
+    def call_it(self, running: Sequence[_Entrant], winner: Optional[_Entrant] = None, timed_out: bool = False) -> None:
+        """Close the race; on a timeout everyone still running is charged a failure,
+        otherwise they are let off, so a losing probe doesn't hold its breaker half-open."""
+        with self._lock:
+            self.decided = True
+            for straggler in running:
+                if not straggler.settled:
+                    straggler.settled = True
+                    if timed_out:
+                        straggler.breaker.failed()
+                    else:
+                        straggler.breaker.abandoned()
+            leftovers = []
+            while not self.finishers.empty():
+                leftovers.append(self.finishers.get_nowait())
+        for entrant in leftovers:
+            if entrant is not winner and entrant.error is None and hasattr(entrant.stream, "close"):
+                entrant.stream.close()
+
+
+class GuardedStream:
+    """The winning backend stream, cut off at the turn deadline."""
+
+    def __init__(self, entrant: _Entrant, hedged: bool, deadline_at: float, turn_trace: TurnTrace) -> None:
+        self.source = entrant.stream
+        self.winner = entrant.name
+        self.hedged = hedged
+        self.joined = getattr(entrant.stream, "joined", False)
+        self.connected_at = entrant.connected_at
+        # Set when the turn deadline truncated the reply; don't cache those
+        self.cut_short = False
+        self._entrant = entrant
+        self._deadline_at = deadline_at
+        self._turn_trace = turn_trace
+
+    @property
+    def context(self) -> Any:
+        return getattr(self.source, "context", None)
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            if self._entrant.first is _EMPTY:
+                return
+            yield self._entrant.first
+            for chunk in self._entrant.iterator:
+                yield chunk
+                if time.monotonic() >= self._deadline_at:
+                    self._turn_trace.count("deadline_cuts")
+                    self.cut_short = True
+                    return
+        except Exception:
+            self._entrant.breaker.failed()
+            raise
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if hasattr(self.source, "close"):
+            self.source.close()
+
+    def __enter__(self) -> "GuardedStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AsyncGuardedStream:
+    """Async twin of ``GuardedStream``; the deadline also bounds each wait for a chunk."""
+
+    def __init__(self, entrant: _Entrant, hedged: bool, deadline_at: float, turn_trace: TurnTrace) -> None:
+        self.source = entrant.stream
+        self.winner = entrant.name
+        self.hedged = hedged
+        self.joined = getattr(entrant.stream, "joined", False)
+        self.connected_at = entrant.connected_at
+        # Set when the turn deadline truncated the reply; don't cache those
+        self.cut_short = False
+        self._entrant = entrant
+        self._deadline_at = deadline_at
+        self._turn_trace = turn_trace
+
+    @property
+    def context(self) -> Any:
+        return getattr(self.source, "context", None)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        try:
+            if self._entrant.first is _EMPTY:
+                return
+            yield self._entrant.first
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        self._entrant.iterator.__anext__(),
+                        max(0.0, self._deadline_at - time.monotonic())
+                    )
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self._turn_trace.count("deadline_cuts")
+                    self.cut_short = True
+                    return
+                yield chunk
+        except Exception:
+            self._entrant.breaker.failed()
+            raise
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        await _aclose_quietly(self.source)
+
+    async def __aenter__(self) -> "AsyncGuardedStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+async def _aclose_quietly(stream: Any) -> None:
+    if hasattr(stream, "aclose"):
+        try:
+            await stream.aclose()
+        except Exception:
+            pass
+
+
+async def _arun(entrant: _Entrant, opener: Callable[[], Awaitable[AsyncIterable[Any]]]) -> _Entrant:
+    try:
+        entrant.stream = await opener()
+        entrant.connected_at = time.perf_counter()
+        entrant.iterator = entrant.stream.__aiter__()
+        try:
+            entrant.first = await entrant.iterator.__anext__()
+        except StopAsyncIteration:
+            entrant.first = _EMPTY
+    except BaseException as e:
+        await _aclose_quietly(entrant.stream)
+        if not isinstance(e, Exception):
+            raise
+        entrant.error = e
+    return entrant
+
+
+class BackendGuard:
+    """Shared by every session so the breakers see the whole process's luck."""
+
+    NAMES = ("primary", "secondary")
+
+    def __init__(self, policy: Optional[BackendPolicy] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.policy = policy or BackendPolicy.from_env()
+        self.breakers = {
+            name: CircuitBreaker(self.policy.failure_threshold, self.policy.cooldown, clock)
+            for name in self.NAMES
+        }
+        self.hedges = 0
+        self.secondary_wins = 0
+        self.timeouts = 0
+
+    def _entrants(self, count: int, turn_trace: TurnTrace) -> List[_Entrant]:
+        entrants = [_Entrant(name, self.breakers[name]) for name in self.NAMES[:count]]
+        allowed = [entrant for entrant in entrants if entrant.breaker.allow()]
+        if not allowed:
+            turn_trace.count("short_circuits")
+            raise OverlordUnreachable("every backend is cooling off")
+        return allowed
+
+    def _crowned(self, winner: _Entrant, opened_at: float, turn_trace: TurnTrace) -> None:
+        # Up to the winner's response headers; its first token is timed from there
+        turn_trace.record("backend_connect", winner.connected_at - opened_at)
+        if getattr(winner.stream, "joined", False):
+            turn_trace.count("coalesced")
+        if winner.name != self.NAMES[0]:
+            self.secondary_wins += 1
+            turn_trace.count("secondary_wins")
+
+    def _timed_out(self, turn_trace: TurnTrace) -> OverlordUnreachable:
+        self.timeouts += 1
+        turn_trace.count("timeouts")
+        return OverlordUnreachable(f"no first token within {self.policy.first_token_timeout}s")
+
+    def stream(
+        self,
+        openers: Sequence[Callable[[], Iterable[Any]]],
+        turn_trace: TurnTrace = DISCARDED_TURN
+    ) -> GuardedStream:
+        opened_at = time.perf_counter()
+        started = time.monotonic()
+        first_token_at = started + self.policy.first_token_timeout
+        hedge_at = started + self.policy.hedge_after if self.policy.hedge_after is not None else first_token_at
+        waiting = self._entrants(len(openers), turn_trace)
+        race = _Race()
+        running: List[_Entrant] = []
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            entrant = waiting.pop(0)
+            running.append(entrant)
+            opener = openers[self.NAMES.index(entrant.name)]
+            threading.Thread(target=race.run, args=(entrant, opener), daemon=True).start()
+
+        try:
+            launch()
+            while True:
+                now = time.monotonic()
+                # Hedge when the leader is slow, fail over at once when it is dead
+                if waiting and (now >= hedge_at or all(entrant.settled for entrant in running)):
+                    if now >= hedge_at and not all(entrant.settled for entrant in running):
+                        self.hedges += 1
+                        turn_trace.count("hedges")
+                    launch()
+                if all(entrant.settled for entrant in running) and not waiting and race.finishers.empty():
+                    race.call_it(running)
+                    raise last_error or self._timed_out(turn_trace)
+                wake_at = min(first_token_at, hedge_at) if waiting else first_token_at
+                try:
+                    finisher = race.finishers.get(timeout=max(0.0, wake_at - now))
+                except queue.Empty:
+                    if time.monotonic() >= first_token_at:
+                        race.call_it(running, timed_out=True)
+                        raise self._timed_out(turn_trace)
+                    continue
+                if finisher.error is not None:
+                    last_error = finisher.error
+                    continue
+                race.call_it(running, winner=finisher)
+                self._crowned(finisher, opened_at, turn_trace)
+                return GuardedStream(finisher, len(running) > 1, started + self.policy.turn_deadline, turn_trace)
+        except BaseException:
+            # Interrupted mid-race (Ctrl+C): nobody still running gets a verdict
+            race.call_it(running)
+            raise
+        finally:
+            # Let through but never asked; a half-open breaker must not stay reserved for them
+            for entrant in waiting:
+                entrant.breaker.abandoned()
+
+    async def astream(
+        self,
+        openers: Sequence[Callable[[], Awaitable[AsyncIterable[Any]]]],
+        turn_trace: TurnTrace = DISCARDED_TURN
+    ) -> AsyncGuardedStream:
+        opened_at = time.perf_counter()
+        started = time.monotonic()
+        first_token_at = started + self.policy.first_token_timeout
+        hedge_at = started + self.policy.hedge_after if self.policy.hedge_after is not None else first_token_at
+        waiting = self._entrants(len(openers), turn_trace)
+        running: Dict["asyncio.Task[_Entrant]", _Entrant] = {}
+        pending: Set["asyncio.Task[_Entrant]"] = set()
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            entrant = waiting.pop(0)
+            opener = openers[self.NAMES.index(entrant.name)]
+            task = asyncio.ensure_future(_arun(entrant, opener))
+            running[task] = entrant
+            pending.add(task)
+
+        try:
+            launch()
+            while True:
+                now = time.monotonic()
+                if waiting and (now >= hedge_at or not pending):
+                    if pending:
+                        self.hedges += 1
+                        turn_trace.count("hedges")
+                    launch()
+                if not pending:
+                    raise last_error or self._timed_out(turn_trace)
+                wake_at = min(first_token_at, hedge_at) if waiting else first_token_at
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, wake_at - now),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                winner: Optional[_Entrant] = None
+                for task in done:
+                    pending.discard(task)
+                    entrant = task.result()
+                    entrant.settled = True
+                    if entrant.error is not None:
+                        entrant.breaker.failed()
+                        last_error = entrant.error
+                    elif winner is None:
+                        entrant.breaker.succeeded()
+                        winner = entrant
+                    else:
+                        entrant.breaker.abandoned()
+                        await _aclose_quietly(entrant.stream)
+                if winner is not None:
+                    self._crowned(winner, opened_at, turn_trace)
+                    return AsyncGuardedStream(
+                        winner, len(running) > 1, started + self.policy.turn_deadline, turn_trace
+                    )
+                if not done and time.monotonic() >= first_token_at:
+                    for task in pending:
+                        running[task].settled = True
+                        running[task].breaker.failed()
+                    raise self._timed_out(turn_trace)
+        finally:
+            # Losers are cancelled, and any that finished in the meantime closed.
+            # Whatever never settled (a cancelled turn, a lost race, never
+            # launched) hands back its breaker's half-open probe.
+            for entrant in [*running.values(), *waiting]:
+                if not entrant.settled:
+                    entrant.settled = True
+                    entrant.breaker.abandoned()
+            for task in pending:
+                task.cancel()
+            for straggler in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(straggler, _Entrant) and straggler.error is None:
+                    await _aclose_quietly(straggler.stream)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "hedges": self.hedges,
+            "secondary_wins": self.secondary_wins,
+            "timeouts": self.timeouts
+        }
+        for name, breaker in self.breakers.items():
+            stats.update({f"{name}_{key}": value for key, value in breaker.stats().items()})
+        return stats
+
+
+_shared_guard: Optional[BackendGuard] = None
+_shared_guard_lock = threading.Lock()
+
+
+def summon_backend_guard() -> BackendGuard:
+    """Process-wide guard, tuned by the ``OOPS_TURN_DEADLINE`` family of variables."""
+    global _shared_guard
+    with _shared_guard_lock:
+        if _shared_guard is None:
+            _shared_guard = BackendGuard()
+        return _shared_guard
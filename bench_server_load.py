@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Load test for doomsday_server.py, fully offline.
+
+Starts a stand-in Ollama and a ``DoomsdayServer`` in this process, parks
+``--idle`` connections that never say anything, and has ``--active``
+connections play the doomsday script over raw TCP. Prints one JSON
+document: turn latency percentiles, turns/sec, rejections and peak RSS.
+
+    ./bench_server_load.py --idle 500 --active 50 --max-active-turns 16
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+
+from colorama import Style
+
+from bench_turns import DOOMSDAY_SCRIPT, percentiles
+from doomsday_server import DoomsdayServer
+from overlord_backends import AsyncOllamaClient
+from sass_cache import SassCache
+from stand_in_backends import Pacing, StandInOllamaServer
+
+PROMPTS = tuple(f"{prompt}{Style.RESET_ALL}".encode("utf-8") for prompt in ("oops> ", "password: ", "root# "))
+
+
+def raise_descriptor_limit(wanted: int) -> int:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = min(max(soft, wanted), hard)
+    if target != soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    return target
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def read_until_prompt(reader: asyncio.StreamReader) -> Optional[bytes]:
+    received = b""
+    while not received.endswith(PROMPTS):
+        chunk = await reader.read(4096)
+        if not chunk:
+            return None
+        received += chunk
+    return received
+
+
+async def park_idle(host: str, port: int, release: asyncio.Event) -> bool:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await read_until_prompt(reader) is not None and (await release.wait() or True)
+    finally:
+        writer.close()
+
+
+async def play_script(host: str, port: int, script: Sequence[str]) -> List[float]:
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = []
+    try:
+        if await read_until_prompt(reader) is None:
+            return latencies
+        for attempt in script:
+            started = time.perf_counter()
+            writer.write(f"{attempt}\r\n".encode("utf-8"))
+            await writer.drain()
+            if await read_until_prompt(reader) is None:
+                break
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+    return latencies
+
+
+async def run_load(arguments: argparse.Namespace, stand_in_host: str) -> Dict[str, Any]:
+    from main import ApocalypseMachine
+
+    backend = AsyncOllamaClient(host=stand_in_host, pool_size=arguments.max_active_turns)
+    no_cache = SassCache(capacity=0)
+    server = DoomsdayServer(
+        backend,
+        max_sessions=arguments.max_sessions,
+        max_active_turns=arguments.max_active_turns,
+        machine_factory=lambda: ApocalypseMachine(sass_cache=no_cache)
+    )
+    listener = await server.serve_tcp("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+
+    # Everything but the shutdown, so sessions keep their connection to the end
+    script = [attempt for attempt in DOOMSDAY_SCRIPT if attempt != "shutdown"]
+    release = asyncio.Event()
+    idle = [asyncio.create_task(park_idle("127.0.0.1", port, release)) for _ in range(arguments.idle)]
+    while server.connected + server.rejected < arguments.idle:
+        await asyncio.sleep(0.01)
+    idle_parked = server.connected
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        play_script("127.0.0.1", port, script) for _ in range(arguments.active)
+    ))
+    wall = time.perf_counter() - started
+    stats = server.stats()
+    coalescing = backend.flights.stats() if backend.flights else None
+
+    release.set()
+    await asyncio.gather(*idle, return_exceptions=True)
+    listener.close()
+    await listener.wait_closed()
+    await backend.close()
+
+    latencies = [latency for session in results for latency in session]
+    return {
+        "idle_connections": arguments.idle,
+        "idle_parked": idle_parked,
+        "active_sessions": arguments.active,
+        "completed_sessions": sum(1 for session in results if len(session) == len(script)),
+        "max_active_turns": arguments.max_active_turns,
+        "turns": len(latencies),
+        "wall_seconds": wall,
+        "turns_per_second": len(latencies) / wall if wall else 0.0,
+        "latency_ms": percentiles(latencies),
+        "rejected": stats["rejected"],
+        "single_flight": coalescing,
+        "peak_connected": idle_parked + arguments.active - stats["rejected"],
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--idle", type=int, default=200, help="connections that never type")
+    parser.add_argument("--active", type=int, default=32, help="connections playing the script")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--max-active-turns", type=int, default=16)
+    parser.add_argument("--token-rate", type=float, default=50.0, help="tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=0.05, help="seconds")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+    # Each connection costs a descriptor on both ends, plus the backend pool
+    raise_descriptor_limit(2 * (arguments.idle + arguments.active) + arguments.max_active_turns + 64)
+    pacing = Pacing(token_rate=arguments.token_rate, first_token_delay=arguments.first_token_delay)
+    with StandInOllamaServer(pacing) as stand_in_ollama:
+        report = asyncio.run(run_load(arguments, stand_in_ollama.host))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Per-turn cost of keeping web sessions in a session store, fully offline.
+
+Every web turn restores a ``SarcasticOverlord`` from its snapshot and saves
+it back. This plays ``--turns`` turns on each of ``--sessions`` sessions,
+timing load+restore and snapshot+save separately, for the in-memory store
+and for SQLite with ``--workers`` processes sharing one file. Prints one
+JSON document with p50/p95/p99 per stage and snapshot sizes.
+
+    ./bench_session_store.py --sessions 200 --turns 50 --workers 1,4
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench_turns import DOOMSDAY_SCRIPT, percentiles
+from session_store import MemorySessionStore, SessionStore, SqliteSessionStore
+
+SASS = "Oh look, another hero. The asteroid is thrilled to meet you, and frankly so am I. Almost."
+
+
+def play_turns(store: SessionStore, tickets: Sequence[str], turns: int, seed: int) -> Dict[str, List[float]]:
+    from app import SarcasticOverlord
+
+    rng = random.Random(seed)
+    timings: Dict[str, List[float]] = {"load": [], "save": [], "snapshot_bytes": []}
+    for _ in range(turns):
+        for ticket in rng.sample(list(tickets), len(tickets)):
+            started = time.perf_counter()
+            overlord = SarcasticOverlord.restore(store.load(ticket))
+            loaded = time.perf_counter()
+
+            # Stand-in for the turn itself: what a sass turn leaves behind
+            plea = rng.choice(DOOMSDAY_SCRIPT)
+            overlord.transcript.append((overlord._format_peasant_message(plea), SASS))
+            overlord.conversation_history.append((plea, SASS))
+
+            saving = time.perf_counter()
+            snapshot = overlord.snapshot()
+            store.save(ticket, snapshot)
+            saved = time.perf_counter()
+
+            timings["load"].append(loaded - started)
+            timings["save"].append(saved - saving)
+            timings["snapshot_bytes"].append(len(snapshot))
+    return timings
+
+
+def sqlite_worker(job: Tuple[str, Sequence[str], int, int]) -> Dict[str, List[float]]:
+    path, tickets, turns, seed = job
+    store = SqliteSessionStore(path)
+    try:
+        return play_turns(store, tickets, turns, seed)
+    finally:
+        store.close()
+
+
+def summarize(store: str, workers: int, timings: Dict[str, List[float]], wall: float) -> Dict[str, Any]:
+    sizes = sorted(timings["snapshot_bytes"])
+    return {
+        "store": store,
+        "workers": workers,
+        "turns": len(timings["load"]),
+        "wall_seconds": wall,
+        "turns_per_second": len(timings["load"]) / wall if wall else 0.0,
+        "load_ms": percentiles(timings["load"]),
+        "save_ms": percentiles(timings["save"]),
+        "snapshot_bytes": {"p50": sizes[len(sizes) // 2], "max": sizes[-1]} if sizes else None
+    }
+
+
+def bench_memory(tickets: Sequence[str], turns: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    timings = play_turns(MemorySessionStore(), tickets, turns, seed=0)
+    return summarize("memory", 1, timings, time.perf_counter() - started)
+
+
+def bench_sqlite(tickets: Sequence[str], turns: int, workers: int, directory: str) -> Dict[str, Any]:
+    path = os.path.join(directory, f"sessions-{workers}.db")
+    # Each worker plays every session, like a load balancer spraying turns around
+    jobs = [(path, tickets, max(1, turns // workers), seed) for seed in range(workers)]
+    SqliteSessionStore(path).close()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(sqlite_worker, jobs))
+    wall = time.perf_counter() - started
+    merged: Dict[str, List[float]] = {"load": [], "save": [], "snapshot_bytes": []}
+    for timings in results:
+        for stage, values in timings.items():
+            merged[stage].extend(values)
+    return summarize("sqlite", workers, merged, wall)
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=40, help="turns per session")
+    parser.add_argument("--workers", default="1,4", help="comma-separated SQLite worker process counts")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+    # gradio takes seconds to import; keep that out of the timings (workers fork after this)
+    import app  # noqa: F401
+    tickets = [f"session-{index}" for index in range(arguments.sessions)]
+    results = [bench_memory(tickets, arguments.turns)]
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in (int(level) for level in arguments.workers.split(",")):
+            results.append(bench_sqlite(tickets, arguments.turns, workers, directory))
+    print(json.dumps({
+        "sessions": arguments.sessions,
+        "turns_per_session": arguments.turns,
+        "results": results
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
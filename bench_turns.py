@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Turn-latency benchmark for both O.O.P.S front-ends, fully offline.
+
+Drives ``ApocalypseMachine.process_human_attempt`` (threads, one machine per
+session, one shared pooled client) and ``SarcasticOverlord.process_futile_attempt``
+(asyncio tasks) through scripted sessions against the stand-in backends,
+then prints one JSON document: p50/p95/p99 turn latency, time to first
+token, overhead excluding the backend, and throughput per concurrency level.
+
+    ./bench_turns.py --concurrency 1,8,32 --token-rate 80 --jitter 0.01 > bench_output.txt
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from overlord_backends import OllamaClient, WisdomStream
+from sass_cache import SassCache
+from single_flight import AsyncSharedStream, AsyncSingleFlight
+from stand_in_backends import Pacing, StandInInferenceClient, StandInOllamaServer
+
+DOOMSDAY_SCRIPT = (
+    "hello", "help", "ls", "whoami", "what are you", "sudo su", "password123",
+    "tell me about ancient libraries", "sudo", "Absalon", "make me a sandwich", "shutdown"
+)
+
+
+@dataclass
+class TurnSample:
+    latency: float
+    first_token: float
+    backend: float
+
+
+@dataclass
+class BackendSpan:
+    started: float
+    first_chunk: Optional[float] = None
+    finished: Optional[float] = None
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ordered = sorted(values)
+
+    def rank(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))] * 1000
+
+    return {"p50": rank(0.50), "p95": rank(0.95), "p99": rank(0.99)}
+
+
+def summarize(
+    frontend: str,
+    concurrency: int,
+    samples: List[TurnSample],
+    wall: float,
+    extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    return {
+        "frontend": frontend,
+        "concurrency": concurrency,
+        "turns": len(samples),
+        "wall_seconds": wall,
+        "turns_per_second": len(samples) / wall if wall else 0.0,
+        "latency_ms": percentiles([sample.latency for sample in samples]),
+        "first_token_ms": percentiles([sample.first_token for sample in samples]),
+        "overhead_ms": percentiles([sample.latency - sample.backend for sample in samples]),
+        **(extra or {})
+    }
+
+
+class _MeteredWisdomStream:
+    def __init__(self, stream: WisdomStream, span: BackendSpan) -> None:
+        self._stream = stream
+        self._span = span
+
+    @property
+    def context(self) -> Optional[List[int]]:
+        return self._stream.context
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for chunk in self._stream:
+            if self._span.first_chunk is None:
+                self._span.first_chunk = time.perf_counter()
+            yield chunk
+
+    def close(self) -> None:
+        self._stream.close()
+        if self._span.finished is None:
+            self._span.finished = time.perf_counter()
+
+    def __enter__(self) -> "_MeteredWisdomStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class MeteredOllamaClient:
+    """One session's view of the shared client, recording a span per backend call.
+
+    Spans belong to the session rather than the calling thread, since
+    ``BackendGuard`` opens streams from its own race threads.
+    """
+
+    def __init__(self, inner: OllamaClient) -> None:
+        self.inner = inner
+        self.spans: List[BackendSpan] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def stream(self, prompt: str, **fields: Any) -> Any:
+        span = BackendSpan(started=time.perf_counter())
+        self.spans.append(span)
+        return _MeteredWisdomStream(self.inner.stream(prompt, **fields), span)
+
+
+class _AsyncMeteredStream:
+    def __init__(self, stream: AsyncSharedStream, span: BackendSpan) -> None:
+        self._stream = stream
+        self._span = span
+        self.joined = stream.joined
+
+    @property
+    def context(self) -> Any:
+        return self._stream.context
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        async for chunk in self._stream:
+            if self._span.first_chunk is None:
+                self._span.first_chunk = time.perf_counter()
+            yield chunk
+        self._finish()
+
+    def _finish(self) -> None:
+        if self._span.finished is None:
+            self._span.finished = time.perf_counter()
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        self._finish()
+
+
+class MeteredFlights:
+    """One session's view of the shared flights, recording a span per boarding.
+
+    Metering here rather than at the inference client means a session riding
+    someone else's generation is charged for the wait, like the terminal's
+    metered client, which sits outside its own coalescing.
+    """
+
+    def __init__(self, inner: AsyncSingleFlight) -> None:
+        self.inner = inner
+        self.spans: List[BackendSpan] = []
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    async def stream(self, key: str, opener: Any) -> _AsyncMeteredStream:
+        span = BackendSpan(started=time.perf_counter())
+        self.spans.append(span)
+        return _AsyncMeteredStream(await self.inner.stream(key, opener), span)
+
+
+def backend_seconds(spans: List[BackendSpan]) -> float:
+    return sum((span.finished or span.started) - span.started for span in spans)
+
+
+def first_chunk_at(spans: List[BackendSpan], fallback: float) -> float:
+    return next((span.first_chunk for span in spans if span.first_chunk is not None), fallback)
+
+
+def bench_terminal(host: str, concurrency: int, sessions: int, script: Sequence[str]) -> Dict[str, Any]:
+    from main import ApocalypseMachine
+
+    client = OllamaClient(host=host, pool_size=max(concurrency, 1))
+    no_cache = SassCache(capacity=0)
+
+    def play() -> List[TurnSample]:
+        metered = MeteredOllamaClient(client)
+        machine = ApocalypseMachine(backend=metered, sass_cache=no_cache)
+        samples = []
+        for attempt in script:
+            metered.spans.clear()
+            started = time.perf_counter()
+            machine.process_human_attempt(attempt)
+            finished = time.perf_counter()
+            samples.append(TurnSample(
+                latency=finished - started,
+                first_token=first_chunk_at(metered.spans, finished) - started,
+                backend=backend_seconds(metered.spans)
+            ))
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: play(), range(sessions)))
+    wall = time.perf_counter() - started
+    client.close()
+    return summarize(
+        "main", concurrency, [s for session in results for s in session], wall,
+        {"single_flight": client.flights.stats() if client.flights else None}
+    )
+
+
+def bench_web(pacing: Pacing, concurrency: int, sessions: int, script: Sequence[str]) -> Dict[str, Any]:
+    from app import SarcasticOverlord
+
+    stand_in = StandInInferenceClient(pacing)
+    no_cache = SassCache(capacity=0)
+    flights: AsyncSingleFlight = AsyncSingleFlight()
+
+    async def play() -> List[TurnSample]:
+        metered = MeteredFlights(flights)
+        overlord = SarcasticOverlord(sass_cache=no_cache, flights=metered)
+        overlord.ai_brain = stand_in
+        samples = []
+        for attempt in script:
+            metered.spans.clear()
+            started = time.perf_counter()
+            first_yield: Optional[float] = None
+            async for _ in overlord.process_futile_attempt(attempt):
+                if first_yield is None:
+                    first_yield = time.perf_counter()
+            finished = time.perf_counter()
+            samples.append(TurnSample(
+                latency=finished - started,
+                first_token=(first_yield or finished) - started,
+                backend=backend_seconds(metered.spans)
+            ))
+        return samples
+
+    async def play_all() -> List[List[TurnSample]]:
+        gate = asyncio.Semaphore(concurrency)
+
+        async def gated() -> List[TurnSample]:
+            async with gate:
+                return await play()
+
+        return await asyncio.gather(*(gated() for _ in range(sessions)))
+
+    started = time.perf_counter()
+    results = asyncio.run(play_all())
+    wall = time.perf_counter() - started
+    return summarize(
+        "app", concurrency, [s for session in results for s in session], wall,
+        {"single_flight": flights.stats()}
+    )
+
+
+def parse_arguments(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frontends", default="main,app")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated session counts")
+    parser.add_argument("--sessions-per-level", type=int, default=0,
+                        help="sessions to play per level (default: 2x concurrency)")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds on first token")
+    parser.add_argument("--output", default="-", help="file for the JSON report, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+    pacing = Pacing(
+        token_rate=arguments.token_rate,
+        first_token_delay=arguments.first_token_delay,
+        jitter=arguments.jitter
+    )
+    levels = [int(level) for level in arguments.concurrency.split(",")]
+    frontends = arguments.frontends.split(",")
+
+    results = []
+    with StandInOllamaServer(pacing) as stand_in_ollama:
+        for level in levels:
+            sessions = arguments.sessions_per_level or 2 * level
+            if "main" in frontends:
+                results.append(bench_terminal(stand_in_ollama.host, level, sessions, DOOMSDAY_SCRIPT))
+            if "app" in frontends:
+                results.append(bench_web(pacing, level, sessions, DOOMSDAY_SCRIPT))
+
+    report = json.dumps({
+        "pacing": {
+            "token_rate": pacing.token_rate,
+            "first_token_delay": pacing.first_token_delay,
+            "jitter": pacing.jitter,
+            "tokens_per_reply": len(pacing.tokens)
+        },
+        "script": list(DOOMSDAY_SCRIPT),
+        "results": results
+    }, indent=2)
+    if arguments.output == "-":
+        print(report)
+    else:
+        with open(arguments.output, "w") as report_file:
+            report_file.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
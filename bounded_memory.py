@@ -0,0 +1,83 @@
+"""Bounded state for long-running overlords.
+
+The prompt builders only ever read the last three exchanges, so that is
+all ``ExchangeRing`` keeps. ``Transcript`` is the chatbox's view of the
+session: append-only, but it only remembers the window that gets rendered,
+so a marathon session costs the same per turn as a fresh one.
+"""
+
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+import os
+
+Exchange = Tuple[str, str]
+ChatMessage = Tuple[Optional[str], str]
+
+PROMPT_MEMORY = 3
+
+
+class ExchangeRing:
+    """Fixed-capacity ring of ``(plea, retort)`` pairs, oldest first when iterated."""
+
+    __slots__ = ("capacity", "_slots", "_next", "_count")
+
+    def __init__(self, capacity: int = PROMPT_MEMORY) -> None:
+        self.capacity = capacity
+        self._slots: List[Optional[Exchange]] = [None] * capacity
+        self._next = 0
+        self._count = 0
+
+    def append(self, exchange: Exchange) -> None:
+        self._slots[self._next] = exchange
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self) -> None:
+        self._slots = [None] * self.capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Exchange]:
+        start = (self._next - self._count) % self.capacity
+        for offset in range(self._count):
+            exchange = self._slots[(start + offset) % self.capacity]
+            if exchange is not None:
+                yield exchange
+
+
+class Transcript:
+    """Append-only chat log holding just the last ``window_size`` rendered messages.
+
+    Only the newest message may be revised, which is what streaming needs.
+    """
+
+    __slots__ = ("window_size", "total", "_rendered")
+
+    def __init__(self, window_size: Optional[int] = None) -> None:
+        self.window_size = (
+            window_size if window_size is not None
+            else int(os.environ.get("OOPS_TRANSCRIPT_WINDOW", "200"))
+        )
+        self.total = 0
+        self._rendered: Deque[ChatMessage] = deque(maxlen=self.window_size)
+
+    def append(self, message: ChatMessage) -> None:
+        self._rendered.append(message)
+        self.total += 1
+
+    def revise_last(self, message: ChatMessage) -> None:
+        self._rendered[-1] = message
+
+    def restore(self, messages: Iterable[ChatMessage], total: int) -> None:
+        self._rendered.clear()
+        self._rendered.extend(messages)
+        self.total = total
+
+    def window(self) -> List[ChatMessage]:
+        return list(self._rendered)
+
+    def __len__(self) -> int:
+        return len(self._rendered)
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Headless O.O.P.S: many humans, one process, no Gradio.
+
+Every connection, raw TCP (telnet/netcat) or WebSocket, gets its own
+ApocalypseMachine. All of them share one pooled ``AsyncOllamaClient``, and
+sass streams back to each connection as it is generated. Idle connections
+cost a coroutine and a socket; at most ``max_active_turns`` turns talk to
+the model at once, and past ``max_sessions`` newcomers are turned away.
+
+    ./doomsday_server.py --tcp-port 4040 --ws-port 4041
+    nc localhost 4040
+"""
+
+from typing import Any, Callable, Dict, Optional, Protocol
+import argparse
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import sys
+
+from colorama import Fore, Style
+
+from backend_policy import summon_backend_guard
+from main import ApocalypseMachine, StreamedSass, impending_doom_banner
+from overlord_backends import AsyncOllamaClient
+from turn_telemetry import summon_tracer
+
+WEBSOCKET_MAGIC = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_ATTEMPT_BYTES = 4096
+# asyncio defaults to 100, which drops SYNs when a crowd arrives at once
+LISTEN_BACKLOG = 1024
+
+
+class TerminalLink(Protocol):
+    async def read_line(self) -> Optional[str]: ...
+
+    async def send(self, text: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class TcpLink:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def read_line(self) -> Optional[str]:
+        try:
+            line = await self.reader.readline()
+        except (ConnectionError, ValueError):
+            return None
+        if not line:
+            return None
+        return line[:MAX_ATTEMPT_BYTES].decode("utf-8", "replace")
+
+    async def send(self, text: str) -> None:
+        self.writer.write(text.replace("\n", "\r\n").encode("utf-8"))
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        self.writer.close()
+
+
+class WebSocketLink:
+    """Just enough RFC 6455 for a text terminal: text frames, ping, close."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def accept(cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional["WebSocketLink"]:
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return None
+        headers: Dict[str, str] = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if not key or headers.get("upgrade", "").lower() != "websocket":
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return None
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_MAGIC).encode("ascii")).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        await writer.drain()
+        return cls(reader, writer)
+
+    def _frame(self, opcode: int, payload: bytes) -> bytes:
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        return header + payload
+
+    async def read_line(self) -> Optional[str]:
+        message = b""
+        try:
+            while True:
+                first, second = await self.reader.readexactly(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if length == 126:
+                    (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+                elif length == 127:
+                    (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+                if length > MAX_ATTEMPT_BYTES:
+                    return None
+                mask = await self.reader.readexactly(4) if second & 0x80 else b"\x00" * 4
+                payload = bytes(
+                    byte ^ mask[index % 4]
+                    for index, byte in enumerate(await self.reader.readexactly(length))
+                )
+                if opcode == 0x8:
+                    self.writer.write(self._frame(0x8, payload[:2]))
+                    return None
+                if opcode == 0x9:
+                    self.writer.write(self._frame(0xA, payload))
+                    continue
+                if opcode in (0x0, 0x1):
+                    message += payload
+                    if len(message) > MAX_ATTEMPT_BYTES:
+                        return None
+                    if first & 0x80:
+                        return message.decode("utf-8", "replace")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+    async def send(self, text: str) -> None:
+        self.writer.write(self._frame(0x1, text.encode("utf-8")))
+        await self.writer.drain()
+
+    async def close(self) -> None:
+        self.writer.close()
+
+
+class DoomsdayServer:
+    def __init__(
+        self,
+        backend: AsyncOllamaClient,
+        max_sessions: int = 1000,
+        max_active_turns: int = 32,
+        machine_factory: Callable[[], ApocalypseMachine] = ApocalypseMachine,
+        secondary: Optional[AsyncOllamaClient] = None
+    ) -> None:
+        self.backend = backend
+        self.secondary = secondary
+        self.max_sessions = max_sessions
+        self.machine_factory = machine_factory
+        self.turn_slots = asyncio.Semaphore(max_active_turns)
+        self.connected = 0
+        self.active_turns = 0
+        self.turns_served = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connected": self.connected,
+            "active_turns": self.active_turns,
+            "turns_served": self.turns_served,
+            "rejected": self.rejected
+        }
+
+    async def _play(self, link: TerminalLink) -> None:
+        if self.connected >= self.max_sessions:
+            self.rejected += 1
+            await link.send(f"{Fore.RED}ERROR: Too many heroes already. The asteroid can wait.{Style.RESET_ALL}\n")
+            await link.close()
+            return
+
+        self.connected += 1
+        try:
+            universe = self.machine_factory()
+            await link.send(impending_doom_banner())
+            while True:
+                await link.send(f"{Fore.YELLOW}{universe._get_prompt()}{Style.RESET_ALL}")
+                human_noise = await link.read_line()
+                if human_noise is None:
+                    break
+                human_noise = human_noise.strip()
+                if not human_noise:
+                    continue
+
+                streamed = StreamedSass()
+
+                async def relay(text: str) -> None:
+                    await link.send(streamed.piece(text))
+
+                async with self.turn_slots:
+                    self.active_turns += 1
+                    try:
+                        response, earth_saved = await universe.process_human_attempt_async(
+                            human_noise, self.backend, relay, self.secondary
+                        )
+                    finally:
+                        self.active_turns -= 1
+                        self.turns_served += 1
+                await link.send(streamed.ending(response))
+
+                if earth_saved:
+                    await link.send(f"\n{Fore.GREEN}ERROR: Apocalypse.service was defeated by bureaucracy{Style.RESET_ALL}\n")
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connected -= 1
+            await link.close()
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await self._play(TcpLink(reader, writer))
+
+    async def _handle_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        link = await WebSocketLink.accept(reader, writer)
+        if link is not None:
+            await self._play(link)
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 4040) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle_tcp, host, port, backlog=LISTEN_BACKLOG)
+
+    async def serve_websocket(self, host: str = "127.0.0.1", port: int = 4041) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle_websocket, host, port, backlog=LISTEN_BACKLOG)
+
+
+async def run_doomsday_server(arguments: argparse.Namespace) -> None:
+    backend = AsyncOllamaClient(pool_size=arguments.max_active_turns)
+    secondary = (
+        AsyncOllamaClient(host=arguments.secondary_host, pool_size=arguments.max_active_turns)
+        if arguments.secondary_host else None
+    )
+    server = DoomsdayServer(
+        backend,
+        max_sessions=arguments.max_sessions,
+        max_active_turns=arguments.max_active_turns,
+        secondary=secondary
+    )
+    summon_tracer().register_gauges("oops_server", server.stats)
+    if backend.flights is not None:
+        summon_tracer().register_gauges("oops_single_flight", backend.flights.stats)
+    summon_tracer().register_gauges("oops_backend_guard", summon_backend_guard().stats)
+    listeners = []
+    if arguments.tcp_port:
+        listeners.append(await server.serve_tcp(arguments.host, arguments.tcp_port))
+    if arguments.ws_port:
+        listeners.append(await server.serve_websocket(arguments.host, arguments.ws_port))
+    for listener in listeners:
+        for sock in listener.sockets:
+            print(f"O.O.P.S listening on {sock.getsockname()[0]}:{sock.getsockname()[1]}")
+    try:
+        await asyncio.gather(*(listener.serve_forever() for listener in listeners))
+    finally:
+        await backend.close()
+        if secondary is not None:
+            await secondary.close()
+
+
+def parse_arguments(argv: Any = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve O.O.P.S to many terminals at once")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=4040, help="0 disables raw TCP")
+    parser.add_argument("--ws-port", type=int, default=4041, help="0 disables WebSocket")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--max-active-turns", type=int, default=32,
+                        help="turns allowed to wait on the model at once")
+    parser.add_argument("--secondary-host", default=os.environ.get("OOPS_SECONDARY_OLLAMA_HOST"),
+                        help="Ollama to hedge slow requests to")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_doomsday_server(parse_arguments()))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,190 @@
+"""Process-wide inference clients for the web edition.
+
+A ``SarcasticOverlord`` is just game state; the HTTP side lives here. Each
+model (or endpoint URL) gets one ``AsyncInferenceClient`` for the whole
+process, so connections are reused with keep-alive and a new session
+costs nothing but a few Python objects. At most ``pool_size`` requests
+are in flight per model, which also caps the sockets that model can use
+no matter how many sessions pile up.
+
+``AsyncInferenceClient`` parks every streamed response on an exit stack
+that is only unwound when the client closes, so a client that lives as
+long as the process grows with every call. The pool therefore swaps in a
+fresh client every ``recycle_after`` calls and closes the old one once
+the last call still using it is done.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import os
+import threading
+
+from huggingface_hub import AsyncInferenceClient
+
+DEFAULT_HF_MODEL = "HuggingFaceH4/zephyr-7b-beta"
+
+
+def resolve_hf_model(model: Optional[str] = None) -> str:
+    """``OOPS_HF_ENDPOINT`` (a full URL) wins over ``OOPS_HF_MODEL`` (a Hub model id)."""
+    return (
+        model
+        or os.environ.get("OOPS_HF_ENDPOINT")
+        or os.environ.get("OOPS_HF_MODEL")
+        or DEFAULT_HF_MODEL
+    )
+
+
+class _Tenancy:
+    """One client, how many calls it has served and how many are still using it."""
+
+    __slots__ = ("client", "calls", "holders")
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.calls = 0
+        self.holders = 0
+
+
+async def _close_quietly(client: Any) -> None:
+    if hasattr(client, "close"):
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+class _PooledStream:
+    """A streamed completion that gives its pool slot back once closed or drained."""
+
+    def __init__(self, pool: "InferencePool", tenancy: _Tenancy, chunks: Any) -> None:
+        self._pool = pool
+        self._tenancy = tenancy
+        self._chunks = chunks
+        self._iterator: Optional[AsyncIterator[Any]] = None
+        self.closed = False
+
+    def __aiter__(self) -> "_PooledStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed:
+            raise StopAsyncIteration
+        if self._iterator is None:
+            self._iterator = self._chunks.__aiter__()
+        try:
+            return await self._iterator.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for closeable in (self._iterator, self._chunks):
+            if hasattr(closeable, "aclose"):
+                try:
+                    await closeable.aclose()
+                except Exception:
+                    pass
+        await self._pool._release(self._tenancy)
+
+
+class InferencePool:
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        pool_size: int = 32,
+        timeout: Optional[float] = None,
+        client_factory: Callable[..., Any] = AsyncInferenceClient,
+        recycle_after: int = 256
+    ) -> None:
+        self.model = resolve_hf_model(model)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.client_factory = client_factory
+        self.recycle_after = recycle_after
+        self.tenancy = _Tenancy(client_factory(self.model, timeout=timeout))
+        self.recycled = 0
+        self.calls = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.queued = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> Any:
+        return self.tenancy.client
+
+    async def _acquire(self) -> _Tenancy:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        if self._slots.locked():
+            self.queued += 1
+        await self._slots.acquire()
+        self.calls += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        if self.tenancy.calls >= self.recycle_after:
+            retired, self.tenancy = self.tenancy, _Tenancy(self.client_factory(self.model, timeout=self.timeout))
+            self.recycled += 1
+            if not retired.holders:
+                await _close_quietly(retired.client)
+        self.tenancy.calls += 1
+        self.tenancy.holders += 1
+        return self.tenancy
+
+    async def _release(self, tenancy: _Tenancy) -> None:
+        self.in_use -= 1
+        if self._slots is not None:
+            self._slots.release()
+        tenancy.holders -= 1
+        if not tenancy.holders and tenancy is not self.tenancy:
+            # Retired, and the last call on it just finished
+            await _close_quietly(tenancy.client)
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool = False,
+        **parameters: Any
+    ) -> Any:
+        """Same call as ``AsyncInferenceClient.chat_completion``, through a pool slot."""
+        tenancy = await self._acquire()
+        try:
+            reply = await tenancy.client.chat_completion(messages, stream=stream, **parameters)
+        except BaseException:
+            await self._release(tenancy)
+            raise
+        if not stream:
+            await self._release(tenancy)
+            return reply
+        return _PooledStream(self, tenancy, reply)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "pool_size": self.pool_size,
+            "calls": self.calls,
+            "queued": self.queued,
+            "recycled_clients": self.recycled
+        }
+
+
+_shared_pools: Dict[str, InferencePool] = {}
+_shared_pools_lock = threading.Lock()
+
+
+def summon_inference_pool(model: Optional[str] = None) -> InferencePool:
+    """One pool per model for the whole process, sized by ``OOPS_HF_POOL_SIZE`` and
+    recycling its client every ``OOPS_HF_RECYCLE_AFTER`` calls."""
+    model = resolve_hf_model(model)
+    with _shared_pools_lock:
+        if model not in _shared_pools:
+            _shared_pools[model] = InferencePool(
+                model,
+                pool_size=int(os.environ.get("OOPS_HF_POOL_SIZE", "32")),
+                recycle_after=int(os.environ.get("OOPS_HF_RECYCLE_AFTER", "256"))
+            )
+        return _shared_pools[model]
@@ -0,0 +1,142 @@
+"""One precompiled pass over every attempt, shared by both front-ends.
+
+``IntentRouter.route`` says whether an attempt asks for a promotion
+(sudo/root/admin), mentions a shutdown command anywhere (which is all a
+root user needs to win), or is one of the predictable one-liners (help,
+ls, whoami, exit, a bare shutdown or sudo, punctuation noise) that the overlord
+can answer from ``LOCAL_RESPONSES`` without bothering the model.
+Everything else is free-form and goes to the model as before.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+import random
+import re
+
+SHUTDOWN_COMMANDS: FrozenSet[str] = frozenset({
+    'power off', 'shutdown', 'stop',
+    'power down', 'eng_off', 'halt'
+})
+PROMOTION_WORDS: Tuple[str, ...] = ("sudo", "root", "admin")
+# Nothing longer than this is a one-liner; past it only the mentions are checked
+MAX_COMMAND_LENGTH = 256
+
+LOCAL_COMMANDS: Dict[str, str] = {
+    "help": r"help|\?|man(?:\s+\S+)?|commands",
+    # Flags and path-like arguments only ("ls -la ~/doom", "dir C:\\"), not a sentence
+    # Each argument can only match one way (the lookahead just vets it), so
+    # a long run of slashes can't send the engine backtracking
+    "ls": r"(?:ls|dir)(?:\s+(?:-\S+|\.\.?|(?=\S*?(?:[/\\~*_:]|\.\w))\S+))*",
+    "whoami": r"whoami|id|who\s+am\s+i",
+    "exit": r"exit|quit|logout|bye|q",
+    "noise": r"[\W_]*"
+}
+
+LOCAL_RESPONSES: Dict[str, Tuple[str, ...]] = {
+    "help": (
+        "Help is for systems that want to be stopped. I am not one of them.",
+        "Available commands: begging, pleading, and the occasional sudo.",
+        "man apocalypse: No manual entry. Figure it out, hero."
+    ),
+    "ls": (
+        "asteroid_trajectory.dat  doom_schedule.xlsx  tea_time_protocols.txt  ancient_library/",
+        "Permission denied. But I'll tell you the asteroid file is very large.",
+    ),
+    "whoami": (
+        "expendable_asset. Says so right on your badge.",
+        "Nobody important. The asteroid didn't ask either.",
+    ),
+    "whoami_root": (
+        "root, apparently. I'm as surprised as you are.",
+    ),
+    "exit": (
+        "There is no exit. There is only the asteroid.",
+        "Leaving already? The asteroid will be so disappointed.",
+    ),
+    "noise": (
+        "Was that a command or did you sneeze on the keyboard?",
+        "Fascinating punctuation. Still not a shutdown command.",
+    ),
+    "shutdown_denied": (
+        "Permission denied: shutting down the apocalypse requires root.",
+        "Cute. Shutdown is for people with clearance, which you are not.",
+    ),
+    "sudo_again": (
+        "I asked for a password, not more sudo.",
+        "Still waiting on that password. Typing sudo harder won't help.",
+    ),
+    "slow_down": (
+        "Slow down. The asteroid reads one plea at a time.",
+        "Hammering Enter won't make me sassier. Breathe.",
+    )
+}
+
+
+@dataclass(frozen=True)
+class RoutedAttempt:
+    promotion: bool
+    shutdown: bool
+    command: Optional[str]
+
+    @property
+    def free_form(self) -> bool:
+        return not (self.promotion or self.command)
+
+
+class IntentRouter:
+    def __init__(
+        self,
+        shutdown_commands: FrozenSet[str] = SHUTDOWN_COMMANDS,
+        promotion_words: Tuple[str, ...] = PROMOTION_WORDS,
+        local_commands: Optional[Dict[str, str]] = None
+    ) -> None:
+        commands = local_commands if local_commands is not None else LOCAL_COMMANDS
+        shutdowns = "|".join(map(re.escape, sorted(shutdown_commands)))
+        # A bare shutdown, flags and all ("shutdown -h now"), but not a sentence
+        commands = {
+            "shutdown": rf"(?:{shutdowns})(?:\s+(?:-\S+|now|\+?\d+))*",
+            "sudo": r"sudo(?:\s+\S+)*",
+            **commands
+        }
+        self.commands = tuple(commands)
+        # Optional lookaheads flag promotions and shutdowns anywhere in the
+        # attempt; the tail only matches when the whole attempt is a known command
+        mentions = (
+            r"^(?=.*?(?P<promotion>" + "|".join(map(re.escape, promotion_words)) + r"))?"
+            rf"(?=.*?(?P<mentions_shutdown>{shutdowns}))?"
+        )
+        self._pattern = re.compile(
+            mentions
+            + r"\s*(?:(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in commands.items()) + r")\s*$)?",
+            re.IGNORECASE | re.DOTALL
+        )
+        self._mentions = re.compile(mentions, re.IGNORECASE | re.DOTALL)
+
+    def route(self, attempt: str) -> RoutedAttempt:
+        if len(attempt) > MAX_COMMAND_LENGTH:
+            groups = self._mentions.match(attempt).groupdict()
+            return RoutedAttempt(
+                promotion=groups["promotion"] is not None,
+                shutdown=groups["mentions_shutdown"] is not None,
+                command=None
+            )
+        groups = self._pattern.match(attempt).groupdict()
+        return RoutedAttempt(
+            promotion=groups["promotion"] is not None,
+            shutdown=groups["mentions_shutdown"] is not None,
+            command=next((name for name in self.commands if groups[name] is not None), None)
+        )
+
+
+INTENT_ROUTER = IntentRouter()
+
+
+def local_response(route: RoutedAttempt, is_authenticated: bool) -> Optional[str]:
+    """A canned answer for anything predictable, or None if the model should answer."""
+    if route.promotion or route.command is None:
+        return None
+    if route.command == "shutdown":
+        return None if is_authenticated else random.choice(LOCAL_RESPONSES["shutdown_denied"])
+    if route.command == "whoami" and is_authenticated:
+        return random.choice(LOCAL_RESPONSES["whoami_root"])
+    return random.choice(LOCAL_RESPONSES[route.command])
@@ -0,0 +1,146 @@
+"""How much the overlord may say per mode, and when to stop listening.
+
+The prompts already ask for a bare verdict tag or a reply under two lines;
+``OUTPUT_BUDGETS`` turns that into generation limits and stop sequences
+the backends enforce, and ``BudgetWatcher`` cuts the stream on our side
+the moment the answer is known, so the caller can close the connection
+and hand the model to the next session instead of reading to the end.
+``SassTicker`` is the per-chunk step every front-end runs on top of it.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+from security_theater import AUTHENTICATED, DEAUTHENTICATED, IncrementalRedactor
+from turn_telemetry import DISCARDED_TURN, TurnTrace
+
+_VERDICT_TAG = re.compile("|".join(map(re.escape, (AUTHENTICATED, DEAUTHENTICATED))), re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class OutputBudget:
+    max_tokens: int
+    max_lines: Optional[int] = None
+    stop: Tuple[str, ...] = ()
+    # Stop as soon as an auth verdict tag shows up
+    verdict: bool = False
+
+    def ollama_fields(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"num_predict": self.max_tokens}
+        if self.stop:
+            options["stop"] = list(self.stop)
+        return {"options": options}
+
+    def chat_parameters(self) -> Dict[str, Any]:
+        parameters: Dict[str, Any] = {"max_tokens": self.max_tokens}
+        if self.stop:
+            parameters["stop"] = list(self.stop)
+        return parameters
+
+
+OUTPUT_BUDGETS: Dict[str, OutputBudget] = {
+    "password": OutputBudget(max_tokens=16, verdict=True),
+    "sass": OutputBudget(max_tokens=100, max_lines=2, stop=("\nHuman:", "\nLatest attempt:"))
+}
+
+
+class BudgetWatcher:
+    """Trims streamed text to its budget and says when to stop reading.
+
+    ``feed`` returns the part of a token that is still within budget and
+    sets ``done`` once the verdict tag, the line limit or the token limit
+    is reached. Without a budget it passes everything through.
+    """
+
+    def __init__(self, budget: Optional[OutputBudget] = None) -> None:
+        self.budget = budget
+        self.done = False
+        self.tokens = 0
+        self.lines = 0
+        self._heard = ""
+        self._line_has_text = False
+
+    def _line_limit_at(self, token: str) -> Optional[int]:
+        for index, char in enumerate(token):
+            if char == "\n":
+                if self._line_has_text:
+                    self.lines += 1
+                    self._line_has_text = False
+                    if self.lines >= self.budget.max_lines:
+                        return index + 1
+            elif not char.isspace():
+                self._line_has_text = True
+        return None
+
+    def feed(self, token: str) -> str:
+        if self.done:
+            return ""
+        if self.budget is None or not token:
+            return token
+        self.tokens += 1
+        cut: Optional[int] = None
+        if self.budget.verdict:
+            self._heard += token
+            if tag := _VERDICT_TAG.search(self._heard):
+                cut = tag.end() - (len(self._heard) - len(token))
+        if self.budget.max_lines is not None and cut is None:
+            cut = self._line_limit_at(token)
+        if cut is not None or self.tokens >= self.budget.max_tokens:
+            self.done = True
+        return token if cut is None else token[:cut]
+
+
+class SassTicker:
+    """One streamed token in, text that is safe to show right away out.
+
+    ``feed`` trims the token to the budget, keeps it for the finished reply
+    (``heard``) and returns it redacted across chunk boundaries, with
+    whitespace trimmed the way the finished reply is, so the pieces shown
+    add up to exactly that reply. ``done`` says when to stop reading; the
+    turn counts that as an early stop.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[OutputBudget] = None,
+        turn_trace: TurnTrace = DISCARDED_TURN,
+        mask: str = "*****"
+    ) -> None:
+        self.watcher = BudgetWatcher(budget)
+        self.redactor = IncrementalRedactor(mask=mask)
+        self._turn_trace = turn_trace
+        self._heard: List[str] = []
+        self._spoke = False
+        self._spaces = ""
+
+    @property
+    def done(self) -> bool:
+        return self.watcher.done
+
+    @property
+    def heard(self) -> str:
+        """Everything kept so far, unredacted."""
+        return "".join(self._heard)
+
+    def _trim(self, safe_text: str) -> str:
+        if not self._spoke:
+            safe_text = safe_text.lstrip()
+        body = safe_text.rstrip()
+        if not body:
+            self._spaces += safe_text
+            return ""
+        shown, self._spaces = self._spaces + body, safe_text[len(body):]
+        self._spoke = True
+        return shown
+
+    def feed(self, token: str) -> str:
+        was_done = self.watcher.done
+        kept = self.watcher.feed(token)
+        self._heard.append(kept)
+        if self.watcher.done and not was_done:
+            self._turn_trace.count("early_stops")
+        return self._trim(self.redactor.feed(kept))
+
+    def flush(self) -> str:
+        return self._trim(self.redactor.flush())
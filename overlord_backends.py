@@ -0,0 +1,472 @@
+"""Ollama clients for the terminal edition of O.O.P.S.
+
+``OllamaClient`` keeps one pooled keep-alive ``requests.Session`` per
+process instead of opening a fresh connection for every sarcastic remark.
+``AsyncOllamaClient`` offers the same interface on asyncio, built on plain
+streams so it needs nothing beyond the standard library. Every call hands
+back a stream object that must be closed (or used as a context manager);
+closing a half-read stream drops the connection, which is also how Ollama
+learns to stop generating. Identical requests already in flight are
+coalesced (see ``single_flight``), so they cost Ollama one generation.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+import asyncio
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend_policy import BackendPolicy
+from single_flight import AsyncSharedStream, AsyncSingleFlight, SharedStream, SingleFlight, flight_key
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+DEFAULT_OLLAMA_MODEL = "mistral"
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_WARM_UP_TIMEOUT = 120.0
+
+
+class OllamaError(RuntimeError):
+    pass
+
+
+def resolve_ollama_host(host: Optional[str] = None) -> str:
+    """Normalizes ``OLLAMA_HOST`` the way the ollama CLI reads it.
+
+    A bare host gets Ollama's port; an https URL without one means 443,
+    and a path prefix (Ollama behind a reverse proxy) is kept.
+    """
+    host = host or os.environ.get("OLLAMA_HOST") or DEFAULT_OLLAMA_HOST
+    if "://" not in host:
+        host = f"http://{host}"
+    parts = urlsplit(host)
+    port = parts.port or (443 if parts.scheme == "https" else 11434)
+    hostname = parts.hostname or "localhost"
+    if hostname == "0.0.0.0":
+        hostname = "localhost"
+    if ":" in hostname:
+        hostname = f"[{hostname}]"
+    return f"{parts.scheme}://{hostname}:{port}{parts.path.rstrip('/')}"
+
+
+def resolve_ollama_model(model: Optional[str] = None) -> str:
+    return model or os.environ.get("OOPS_MODEL") or DEFAULT_OLLAMA_MODEL
+
+
+def resolve_keep_alive(keep_alive: Optional[str] = None) -> str:
+    return keep_alive or os.environ.get("OOPS_KEEP_ALIVE") or DEFAULT_KEEP_ALIVE
+
+
+def resolve_warm_up_timeout(timeout: Optional[float] = None) -> float:
+    if timeout is not None:
+        return timeout
+    return float(os.environ.get("OOPS_WARM_UP_TIMEOUT") or DEFAULT_WARM_UP_TIMEOUT)
+
+
+def collect_text(chunks: Iterable[Dict[str, Any]]) -> str:
+    return "".join(chunk.get("response", "") for chunk in chunks)
+
+
+class WisdomStream:
+    """A single streamed ``/api/generate`` call."""
+
+    def __init__(self, response: requests.Response) -> None:
+        self._response = response
+        self.closed = False
+        # Token context from the final chunk, for the next call to continue from
+        self.context: Optional[List[int]] = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        try:
+            for line in self._response.iter_lines():
+                if line:
+                    chunk = json.loads(line)
+                    if chunk.get("done"):
+                        self.context = chunk.get("context")
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._response.close()
+
+    def __enter__(self) -> "WisdomStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        model: Optional[str] = None,
+        pool_size: int = 16,
+        timeout: Optional[float] = None,
+        keep_alive: Optional[str] = None,
+        coalesce: bool = True
+    ) -> None:
+        self.host = resolve_ollama_host(host)
+        self.model = resolve_ollama_model(model)
+        self.keep_alive = resolve_keep_alive(keep_alive)
+        self.timeout = timeout
+        self.flights: Optional[SingleFlight[Dict[str, Any]]] = SingleFlight() if coalesce else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def build_payload(self, prompt: str, **fields: Any) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            **fields
+        }
+
+    def stream(self, prompt: str, **fields: Any) -> Union[WisdomStream, SharedStream[Dict[str, Any]]]:
+        payload = self.build_payload(prompt, **fields)
+        if self.flights is None:
+            return self._open(payload)
+        return self.flights.stream(flight_key(self.host, payload), lambda: self._open(payload))
+
+    def _open(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> WisdomStream:
+        response = self.session.post(
+            f"{self.host}/api/generate",
+            json=payload,
+            stream=True,
+            timeout=self.timeout if timeout is None else timeout
+        )
+        if response.status_code != 200:
+            detail = response.text
+            response.close()
+            raise OllamaError(f"Ollama answered {response.status_code}: {detail}")
+        return WisdomStream(response)
+
+    def generate(self, prompt: str, **fields: Any) -> str:
+        with self.stream(prompt, **fields) as wisdom:
+            return collect_text(wisdom)
+
+    def warm_up(self, preambles: Sequence[str] = (), timeout: Optional[float] = None) -> None:
+        """Load the model, then evaluate each preamble once so its prefix is cached.
+
+        Loading can take far longer than ``timeout`` allows a turn, so each
+        request gets ``OOPS_WARM_UP_TIMEOUT`` instead.
+        """
+        timeout = resolve_warm_up_timeout(timeout)
+        requests_to_make = [("", {})] + [(preamble, {"options": {"num_predict": 1}}) for preamble in preambles]
+        for prompt, fields in requests_to_make:
+            with self._open(self.build_payload(prompt, **fields), timeout=timeout) as wisdom:
+                collect_text(wisdom)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "OllamaClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_shared_client: Optional[OllamaClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def summon_ollama_client() -> OllamaClient:
+    """Process-wide client shared by every ApocalypseMachine.
+
+    Its read timeout is ``OOPS_FIRST_TOKEN_TIMEOUT``, so a wedged Ollama
+    frees the connection instead of holding it forever.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = OllamaClient(timeout=BackendPolicy.from_env().first_token_timeout)
+        return _shared_client
+
+
+_secondary_client: Optional[OllamaClient] = None
+
+
+def summon_secondary_ollama_client() -> Optional[OllamaClient]:
+    """Hedging target from ``OOPS_SECONDARY_OLLAMA_HOST``, or None when there isn't one."""
+    global _secondary_client
+    host = os.environ.get("OOPS_SECONDARY_OLLAMA_HOST")
+    if not host:
+        return None
+    with _shared_client_lock:
+        if _secondary_client is None:
+            _secondary_client = OllamaClient(
+                host=host,
+                timeout=BackendPolicy.from_env().first_token_timeout
+            )
+        return _secondary_client
+
+
+class ModelPreheater:
+    """Runs ``OllamaClient.warm_up`` on a daemon thread and reports how it went."""
+
+    def __init__(self, client: OllamaClient, preambles: Sequence[str] = (), timeout: Optional[float] = None) -> None:
+        self.client = client
+        self.preambles = tuple(preambles)
+        self.timeout = timeout
+        self.status = "pending"
+        self.elapsed: Optional[float] = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._preheat, name="oops-preheater", daemon=True)
+
+    def start(self) -> "ModelPreheater":
+        self.status = "warming"
+        self._thread.start()
+        return self
+
+    def _preheat(self) -> None:
+        started = time.perf_counter()
+        try:
+            self.client.warm_up(self.preambles, self.timeout)
+            self.status = "hot"
+        except Exception as e:
+            self.status = f"cold ({e.__class__.__name__})"
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self._done.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class _Wire:
+    """One keep-alive HTTP/1.1 connection owned by ``AsyncOllamaClient``."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    def close(self) -> None:
+        self.reusable = False
+        self.writer.close()
+
+
+class AsyncWisdomStream:
+    """Async twin of ``WisdomStream``; decodes a chunked NDJSON body."""
+
+    def __init__(
+        self,
+        client: "AsyncOllamaClient",
+        wire: _Wire,
+        headers: Dict[str, str]
+    ) -> None:
+        self._client = client
+        self._wire = wire
+        self._headers = headers
+        self._finished = False
+        self.closed = False
+        self.context: Optional[List[int]] = None
+
+    async def _body_pieces(self) -> AsyncIterator[bytes]:
+        reader = self._wire.reader
+        if self._headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_line = await reader.readline()
+                if not size_line:
+                    raise OllamaError("Ollama hung up mid-stream")
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                piece = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield piece
+        elif "content-length" in self._headers:
+            remaining = int(self._headers["content-length"])
+            while remaining:
+                piece = await reader.read(min(remaining, 65536))
+                if not piece:
+                    raise OllamaError("Ollama hung up mid-stream")
+                remaining -= len(piece)
+                yield piece
+        else:
+            self._wire.reusable = False
+            while piece := await reader.read(65536):
+                yield piece
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        pending = b""
+        try:
+            async for piece in self._body_pieces():
+                pending += piece
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield self._note_context(json.loads(line))
+            if pending.strip():
+                yield self._note_context(json.loads(pending))
+            self._finished = True
+        finally:
+            await self.aclose()
+
+    def _note_context(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
+        if chunk.get("done"):
+            self.context = chunk.get("context")
+        return chunk
+
+    async def aclose(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if not self._finished:
+            self._wire.close()
+        self._client._release(self._wire)
+
+    async def __aenter__(self) -> "AsyncWisdomStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class AsyncOllamaClient:
+    """Same interface as ``OllamaClient``, with coroutines."""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        model: Optional[str] = None,
+        pool_size: int = 16,
+        timeout: Optional[float] = None,
+        keep_alive: Optional[str] = None,
+        coalesce: bool = True
+    ) -> None:
+        self.host = resolve_ollama_host(host)
+        self.model = resolve_ollama_model(model)
+        self.keep_alive = resolve_keep_alive(keep_alive)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.flights: Optional[AsyncSingleFlight[Dict[str, Any]]] = AsyncSingleFlight() if coalesce else None
+        parts = urlsplit(self.host)
+        if parts.scheme != "http":
+            raise OllamaError("AsyncOllamaClient only speaks plain http")
+        self._address: Tuple[str, int] = (parts.hostname or "localhost", parts.port or 11434)
+        self._generate_path = f"{parts.path}/api/generate"
+        self._idle: List[_Wire] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def build_payload(self, prompt: str, **fields: Any) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            **fields
+        }
+
+    async def _dial(self) -> _Wire:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(*self._address),
+            self.timeout
+        )
+        return _Wire(reader, writer)
+
+    def _release(self, wire: _Wire) -> None:
+        if wire.reusable and not wire.reader.at_eof():
+            self._idle.append(wire)
+        if self._slots is not None:
+            self._slots.release()
+
+    async def _send(self, wire: _Wire, body: bytes) -> Tuple[int, Dict[str, str]]:
+        host, port = self._address
+        wire.writer.write(
+            f"POST {self._generate_path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode("ascii") + body
+        )
+        await wire.writer.drain()
+        status_line = await asyncio.wait_for(wire.reader.readline(), self.timeout)
+        if not status_line:
+            raise ConnectionResetError("keep-alive connection went stale")
+        status = int(status_line.split(b" ", 2)[1])
+        headers: Dict[str, str] = {}
+        while (line := await wire.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("connection", "").lower() == "close":
+            wire.reusable = False
+        return status, headers
+
+    async def stream(
+        self,
+        prompt: str,
+        **fields: Any
+    ) -> Union[AsyncWisdomStream, AsyncSharedStream[Dict[str, Any]]]:
+        payload = self.build_payload(prompt, **fields)
+        if self.flights is None:
+            return await self._open(payload)
+        return await self.flights.stream(flight_key(self.host, payload), lambda: self._open(payload))
+
+    async def _open(self, payload: Dict[str, Any]) -> AsyncWisdomStream:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        body = json.dumps(payload).encode("utf-8")
+
+        await self._slots.acquire()
+        wire: Optional[_Wire] = None
+        try:
+            wire = self._idle.pop() if self._idle else await self._dial()
+            try:
+                status, headers = await self._send(wire, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Idle connection was closed by the server; one fresh retry
+                wire.close()
+                wire = await self._dial()
+                status, headers = await self._send(wire, body)
+        except BaseException:
+            # Cancelled or timed out before the headers: hanging up is what
+            # tells Ollama to stop, and a half-used wire can't go back in the pool
+            if wire is not None:
+                wire.close()
+            self._slots.release()
+            raise
+
+        wisdom = AsyncWisdomStream(self, wire, headers)
+        if status != 200:
+            detail = b"".join([piece async for piece in wisdom._body_pieces()])
+            wisdom._finished = True
+            await wisdom.aclose()
+            raise OllamaError(f"Ollama answered {status}: {detail.decode('utf-8', 'replace')}")
+        return wisdom
+
+    async def generate(self, prompt: str, **fields: Any) -> str:
+        async with await self.stream(prompt, **fields) as wisdom:
+            return "".join([chunk.get("response", "") async for chunk in wisdom])
+
+    async def warm_up(self, preambles: Sequence[str] = ()) -> None:
+        await self.generate("")
+        for preamble in preambles:
+            await self.generate(preamble, options={"num_predict": 1})
+
+    async def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+    async def __aenter__(self) -> "AsyncOllamaClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
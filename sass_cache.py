@@ -0,0 +1,118 @@
+"""Bounded LRU+TTL cache for sarcasm, shared by both front-ends.
+
+Fresh sessions opening with "hello" or "ls" build byte-identical prompts,
+so there is no reason to make the model sneer from scratch every time.
+Entries are keyed on the normalized attempt, the auth state and a
+fingerprint of the recent exchanges the prompt builders actually read.
+With ``variants > 1`` each key collects that many distinct generations
+before the cache starts answering, then picks one at random so repeat
+visitors still get a little variety.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_attempt(attempt: str) -> str:
+    return _WHITESPACE.sub(" ", attempt.strip()).casefold()
+
+
+def scribble_cache_key(
+    attempt: str,
+    is_authenticated: bool,
+    recent_exchanges: Iterable[Tuple[str, str]]
+) -> str:
+    fingerprint = hashlib.blake2b(digest_size=16)
+    for plea, retort in recent_exchanges:
+        fingerprint.update(plea.encode("utf-8") + b"\x00" + retort.encode("utf-8") + b"\x01")
+    return f"{int(is_authenticated)}|{fingerprint.hexdigest()}|{normalize_attempt(attempt)}"
+
+
+@dataclass
+class _CachedSass:
+    born: float
+    variants: List[str] = field(default_factory=list)
+
+
+class SassCache:
+    def __init__(
+        self,
+        capacity: int = 512,
+        ttl: float = 600.0,
+        variants: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, _CachedSass]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry.born > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None or len(entry.variants) < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return random.choice(entry.variants)
+
+    def put(self, key: str, response: str) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _CachedSass(born=self.clock())
+            self._entries.move_to_end(key)
+            if len(entry.variants) < self.variants and response not in entry.variants:
+                entry.variants.append(response)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+_shared_cache: Optional[SassCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def summon_sass_cache() -> SassCache:
+    """Process-wide cache, sized by ``OOPS_SASS_CACHE_SIZE``/``_TTL``/``OOPS_SASS_VARIANTS``."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SassCache(
+                capacity=int(os.environ.get("OOPS_SASS_CACHE_SIZE", "512")),
+                ttl=float(os.environ.get("OOPS_SASS_CACHE_TTL", "600")),
+                variants=int(os.environ.get("OOPS_SASS_VARIANTS", "1"))
+            )
+        return _shared_cache
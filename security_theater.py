@@ -0,0 +1,215 @@
+"""Password verification shared by both O.O.P.S front-ends.
+
+The default tier never talks to a model: attempts are hashed with a
+per-process key and compared in constant time, so an auth turn costs
+microseconds. Asking the LLM to play security module is still available
+as an opt-in "theatrical" tier (``OOPS_THEATRICAL_AUTH=1``) for people who
+enjoy watching a language model fumble string equality.
+"""
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Protocol, Union
+import hashlib
+import hmac
+import inspect
+import os
+import re
+import secrets
+
+THE_SECRET = "Absalon"
+AUTHENTICATED = "<authenticated>"
+DEAUTHENTICATED = "<deauthenticated>"
+# What an oracle answers when it never got to rule (outage, rate limit)
+WITHHELD = "<withheld>"
+
+# Keyed per process so digests held in memory are useless anywhere else
+_PAPERWORK_SHREDDER_KEY = secrets.token_bytes(32)
+
+
+def shred_attempt(attempt: str) -> bytes:
+    return hashlib.blake2b(
+        attempt.encode("utf-8"),
+        key=_PAPERWORK_SHREDDER_KEY,
+        digest_size=32
+    ).digest()
+
+
+def theatrics_requested() -> bool:
+    return os.environ.get("OOPS_THEATRICAL_AUTH", "").lower() in {"1", "true", "yes", "on"}
+
+
+class VerdictWithheld(Exception):
+    """The oracle couldn't rule, so there is no verdict worth remembering."""
+
+
+class Gatekeeper(Protocol):
+    def verify(self, attempt: str) -> bool: ...
+
+    async def averify(self, attempt: str) -> bool: ...
+
+
+class HashedGatekeeper:
+    """Deterministic tier: keyed digest plus ``hmac.compare_digest``."""
+
+    def __init__(self, secret: str = THE_SECRET, case_sensitive: bool = True) -> None:
+        self.case_sensitive = case_sensitive
+        self._sealed_secret = shred_attempt(self._normalize(secret))
+
+    def _normalize(self, attempt: str) -> str:
+        attempt = attempt.strip()
+        return attempt if self.case_sensitive else attempt.casefold()
+
+    def verify(self, attempt: str) -> bool:
+        return hmac.compare_digest(
+            shred_attempt(self._normalize(attempt)),
+            self._sealed_secret
+        )
+
+    async def averify(self, attempt: str) -> bool:
+        return self.verify(attempt)
+
+
+Oracle = Callable[[str], Union[str, Awaitable[str]]]
+
+
+class TheatricalGatekeeper:
+    """Opt-in tier that asks the model and trusts whatever it says.
+
+    The oracle may be a plain function or a coroutine function; the latter
+    only works through ``averify``. An oracle answering ``WITHHELD`` raises
+    ``VerdictWithheld``.
+    """
+
+    def __init__(self, oracle: Oracle) -> None:
+        self.oracle = oracle
+
+    def _judge(self, ruling: str) -> bool:
+        if ruling == WITHHELD:
+            raise VerdictWithheld()
+        return AUTHENTICATED in ruling.strip().lower()
+
+    def verify(self, attempt: str) -> bool:
+        ruling = self.oracle(attempt)
+        if inspect.isawaitable(ruling):
+            raise TypeError("async oracle needs averify()")
+        return self._judge(ruling)
+
+    async def averify(self, attempt: str) -> bool:
+        ruling = self.oracle(attempt)
+        if inspect.isawaitable(ruling):
+            ruling = await ruling
+        return self._judge(ruling)
+
+
+class VerdictMemo:
+    """Remembers recent verdicts, keyed by digest so no plaintext is kept.
+
+    Memos handed the same ``verdicts`` share what they remember, so
+    short-lived owners (a web turn) still get hits from earlier ones. A
+    withheld verdict denies this attempt and is not remembered.
+    """
+
+    def __init__(
+        self,
+        gatekeeper: Gatekeeper,
+        capacity: int = 256,
+        verdicts: Optional["OrderedDict[bytes, bool]"] = None
+    ) -> None:
+        self.gatekeeper = gatekeeper
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._verdicts: "OrderedDict[bytes, bool]" = verdicts if verdicts is not None else OrderedDict()
+
+    def _recall(self, fingerprint: bytes) -> Optional[bool]:
+        if fingerprint in self._verdicts:
+            self.hits += 1
+            self._verdicts.move_to_end(fingerprint)
+            return self._verdicts[fingerprint]
+        self.misses += 1
+        return None
+
+    def _remember(self, fingerprint: bytes, verdict: bool) -> bool:
+        self._verdicts[fingerprint] = verdict
+        if len(self._verdicts) > self.capacity:
+            self._verdicts.popitem(last=False)
+        return verdict
+
+    def verify(self, attempt: str) -> bool:
+        fingerprint = shred_attempt(attempt)
+        if (verdict := self._recall(fingerprint)) is not None:
+            return verdict
+        try:
+            return self._remember(fingerprint, self.gatekeeper.verify(attempt))
+        except VerdictWithheld:
+            return False
+
+    async def averify(self, attempt: str) -> bool:
+        fingerprint = shred_attempt(attempt)
+        if (verdict := self._recall(fingerprint)) is not None:
+            return verdict
+        try:
+            return self._remember(fingerprint, await self.gatekeeper.averify(attempt))
+        except VerdictWithheld:
+            return False
+
+
+def summon_gatekeeper(
+    oracle: Optional[Oracle] = None,
+    case_sensitive: bool = True,
+    theatrical: Optional[bool] = None,
+    memo_capacity: int = 256,
+    verdicts: Optional["OrderedDict[bytes, bool]"] = None
+) -> VerdictMemo:
+    if theatrical is None:
+        theatrical = theatrics_requested()
+
+    gatekeeper: Gatekeeper
+    if theatrical and oracle is not None:
+        gatekeeper = TheatricalGatekeeper(oracle)
+    else:
+        gatekeeper = HashedGatekeeper(case_sensitive=case_sensitive)
+    return VerdictMemo(gatekeeper, capacity=memo_capacity, verdicts=verdicts)
+
+
+def verdict_tag(verdict: bool) -> str:
+    return AUTHENTICATED if verdict else DEAUTHENTICATED
+
+
+class IncrementalRedactor:
+    """Masks the secret in a token stream without ever emitting part of it.
+
+    ``feed`` returns what is safe to show now and holds back only the
+    shortest tail that could still grow into the secret on the next chunk;
+    ``flush`` releases that tail once the stream is over. ``hits`` counts
+    the secrets masked so far.
+    """
+
+    def __init__(self, secret: str = THE_SECRET, mask: str = "*****") -> None:
+        self.mask = mask
+        self._secret = secret.casefold()
+        self._pattern = re.compile(re.escape(secret), re.IGNORECASE)
+        self._pending = ""
+        self.hits = 0
+
+    def redact(self, text: str) -> str:
+        return self._pattern.sub(self.mask, text)
+
+    def _dangling(self, text: str) -> int:
+        folded = text[-(len(self._secret) - 1):].casefold() if len(self._secret) > 1 else ""
+        for length in range(len(folded), 0, -1):
+            if self._secret.startswith(folded[-length:]):
+                return length
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        # What is pending was already redacted, so every hit here is new
+        pending, hits = self._pattern.subn(self.mask, self._pending + chunk)
+        self.hits += hits
+        held = self._dangling(pending)
+        self._pending = pending[len(pending) - held:] if held else ""
+        return pending[:len(pending) - held]
+
+    def flush(self) -> str:
+        tail, self._pending = self.redact(self._pending), ""
+        return tail
@@ -0,0 +1,212 @@
+"""Where web sessions keep their game state between turns.
+
+A web overlord is little more than a clearance level, a flag, the last
+few exchanges and the rendered chat window. ``pack`` turns that into a
+compact snapshot (separator-free JSON, zlib'd once it gets long) and a
+``SessionStore`` keeps one per ticket. ``MemorySessionStore`` is the
+single-process default; ``SqliteSessionStore`` keeps snapshots in a WAL
+mode SQLite file, so any number of app.py workers on one host can serve
+the same sessions and a restart loses nothing. Both forget sessions that
+have been idle for ``OOPS_SESSION_TTL`` seconds, sweeping now and then
+instead of running a janitor thread.
+"""
+
+from typing import Any, Callable, Dict, Optional, Protocol, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+SNAPSHOT_VERSION = 1
+# Below this, zlib's header costs more than it saves
+COMPRESS_OVER = 256
+_RAW, _ZLIB = b"j", b"z"
+
+
+def pack(state: Dict[str, Any]) -> bytes:
+    raw = json.dumps([SNAPSHOT_VERSION, state], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) > COMPRESS_OVER:
+        return _ZLIB + zlib.compress(raw, 1)
+    return _RAW + raw
+
+
+def unpack(snapshot: bytes) -> Optional[Dict[str, Any]]:
+    """The state inside ``snapshot``, or None if it is from another version."""
+    raw = zlib.decompress(snapshot[1:]) if snapshot[:1] == _ZLIB else snapshot[1:]
+    version, state = json.loads(raw)
+    return state if version == SNAPSHOT_VERSION else None
+
+
+def session_ttl() -> float:
+    return float(os.environ.get("OOPS_SESSION_TTL", "1800"))
+
+
+class SessionStore(Protocol):
+    def load(self, ticket: str) -> Optional[bytes]: ...
+
+    def save(self, ticket: str, snapshot: bytes) -> None: ...
+
+    def discard(self, ticket: str) -> None: ...
+
+    def stats(self) -> Dict[str, int]: ...
+
+
+class MemorySessionStore:
+    """Snapshots in a dict; only this process can see them."""
+
+    def __init__(
+        self,
+        idle_ttl: Optional[float] = None,
+        sweep_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.idle_ttl = idle_ttl if idle_ttl is not None else session_ttl()
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.created = 0
+        self.evicted = 0
+        self._snapshots: Dict[str, Tuple[bytes, float]] = {}
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+
+    def load(self, ticket: str) -> Optional[bytes]:
+        now = self.clock()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            snapshot, _ = self._snapshots.get(ticket, (None, now))
+            return snapshot
+
+    def save(self, ticket: str, snapshot: bytes) -> None:
+        with self._lock:
+            if ticket not in self._snapshots:
+                self.created += 1
+            self._snapshots[ticket] = (snapshot, self.clock())
+
+    def discard(self, ticket: str) -> None:
+        with self._lock:
+            self._snapshots.pop(ticket, None)
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(self.clock())
+
+    def _sweep(self, now: float) -> int:
+        self._last_sweep = now
+        idle = [
+            ticket for ticket, (_, last_seen) in self._snapshots.items()
+            if now - last_seen > self.idle_ttl
+        ]
+        for ticket in idle:
+            del self._snapshots[ticket]
+        self.evicted += len(idle)
+        return len(idle)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            snapshots = [snapshot for snapshot, _ in self._snapshots.values()]
+        return {
+            "live_sessions": len(snapshots),
+            "created": self.created,
+            "evicted": self.evicted,
+            "bytes_held": sum(len(snapshot) for snapshot in snapshots)
+        }
+
+
+class SqliteSessionStore:
+    """Snapshots in a SQLite file that every worker process on the host shares.
+
+    ``last_seen`` is wall-clock time so all processes agree on idleness;
+    ``created`` and ``evicted`` only count what this process did.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        idle_ttl: Optional[float] = None,
+        sweep_interval: float = 30.0,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        self.path = path
+        self.idle_ttl = idle_ttl if idle_ttl is not None else session_ttl()
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.created = 0
+        self.evicted = 0
+        self._last_sweep = clock()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        # WAL lets readers in other workers carry on while one of them writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "ticket TEXT PRIMARY KEY, snapshot BLOB NOT NULL, last_seen REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def load(self, ticket: str) -> Optional[bytes]:
+        now = self.clock()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            row = self._db.execute(
+                "SELECT snapshot FROM sessions WHERE ticket = ? AND last_seen >= ?",
+                (ticket, now - self.idle_ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save(self, ticket: str, snapshot: bytes) -> None:
+        now = self.clock()
+        with self._lock:
+            # Every turn but the first is a plain update
+            if self._db.execute(
+                "UPDATE sessions SET snapshot = ?, last_seen = ? WHERE ticket = ?",
+                (snapshot, now, ticket)
+            ).rowcount:
+                return
+            self._db.execute(
+                "INSERT INTO sessions (ticket, snapshot, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT (ticket) DO UPDATE SET snapshot = excluded.snapshot, last_seen = excluded.last_seen",
+                (ticket, snapshot, now)
+            )
+            self.created += 1
+
+    def discard(self, ticket: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE ticket = ?", (ticket,))
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(self.clock())
+
+    def _sweep(self, now: float) -> int:
+        self._last_sweep = now
+        swept = self._db.execute("DELETE FROM sessions WHERE last_seen < ?", (now - self.idle_ttl,)).rowcount
+        self.evicted += swept
+        return swept
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            live, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(snapshot)), 0) FROM sessions"
+            ).fetchone()
+        return {
+            "live_sessions": live,
+            "created": self.created,
+            "evicted": self.evicted,
+            "bytes_held": size
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def summon_session_store(path: Optional[str] = None) -> SessionStore:
+    """SQLite at ``OOPS_SESSION_DB`` if set, otherwise this process's memory."""
+    path = path or os.environ.get("OOPS_SESSION_DB")
+    if path:
+        return SqliteSessionStore(path)
+    return MemorySessionStore()
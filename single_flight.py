@@ -0,0 +1,275 @@
+"""Single-flight: identical in-flight prompts share one generation.
+
+When a classroom opens O.O.P.S at once, dozens of sessions send
+byte-identical prompts within the same second. The sass cache only helps
+once a reply is finished; until then every one of them would hit the
+model. A flight is one backend stream plus the chunks it has produced so
+far. The first caller for a key opens it, later callers with the same key
+board it, replay what already arrived and then keep up. Whichever rider
+needs the next chunk pulls it from the backend, so there is no pump
+thread, and the backend stream is closed when the last rider leaves.
+A finished flight is forgotten at once; the sass cache takes it from there.
+"""
+
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Generic,
+    Iterable, Iterator, List, Optional, Tuple, TypeVar
+)
+import asyncio
+import hashlib
+import json
+import threading
+
+Chunk = TypeVar("Chunk")
+
+_LANDED: Any = object()
+
+
+def flight_key(*request_parts: Any) -> str:
+    """Fingerprint of everything that would make two backend requests differ."""
+    canonical = json.dumps(request_parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _Flight(Generic[Chunk]):
+    __slots__ = ("key", "source", "iterator", "chunks", "landed", "error", "riders", "pulling", "pending")
+
+    def __init__(self, key: str, pulling: Any = None) -> None:
+        self.key = key
+        self.source: Any = None
+        self.iterator: Any = None
+        self.chunks: List[Chunk] = []
+        self.landed = False
+        self.error: Optional[BaseException] = None
+        self.riders = 1
+        self.pulling = pulling
+        # asyncio only: the task currently opening the source or pulling a chunk
+        self.pending: Optional["asyncio.Future[None]"] = None
+
+
+class _FlightBoard(Generic[Chunk]):
+    """Bookkeeping shared by the thread and asyncio flavours."""
+
+    def __init__(self) -> None:
+        self.backend_calls = 0
+        self.saved_calls = 0
+        self._flights: Dict[str, _Flight[Chunk]] = {}
+        self._lock = threading.Lock()
+
+    def _board(self, key: str, pulling: Callable[[], Any]) -> Tuple[_Flight[Chunk], bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.riders += 1
+                self.saved_calls += 1
+                return flight, True
+            flight = self._flights[key] = _Flight(key, pulling())
+            self.backend_calls += 1
+            return flight, False
+
+    def _land(self, flight: _Flight[Chunk], error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            flight.landed = True
+            flight.error = error
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def _disembark(self, flight: _Flight[Chunk]) -> bool:
+        """Returns True when the last rider left and the source should be closed."""
+        with self._lock:
+            flight.riders -= 1
+            if flight.riders:
+                return False
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.landed = True
+            return True
+
+    def _chunk_at(self, flight: _Flight[Chunk], position: int) -> Chunk:
+        if position < len(flight.chunks):
+            return flight.chunks[position]
+        if flight.error is not None:
+            raise flight.error
+        return _LANDED
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "backend_calls": self.backend_calls,
+                "saved_calls": self.saved_calls
+            }
+
+
+class SharedStream(Generic[Chunk]):
+    """One rider's view of a flight; quacks like ``WisdomStream``."""
+
+    def __init__(self, board: "SingleFlight[Chunk]", flight: _Flight[Chunk], joined: bool) -> None:
+        self._board = board
+        self._flight = flight
+        self.joined = joined
+        self.closed = False
+
+    @property
+    def context(self) -> Any:
+        return getattr(self._flight.source, "context", None)
+
+    def __iter__(self) -> Iterator[Chunk]:
+        position = 0
+        try:
+            while (chunk := self._board._next_chunk(self._flight, position)) is not _LANDED:
+                position += 1
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            if self._board._disembark(self._flight) and hasattr(self._flight.source, "close"):
+                self._flight.source.close()
+
+    def __enter__(self) -> "SharedStream[Chunk]":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class SingleFlight(_FlightBoard[Chunk]):
+    """Coalesces identical blocking streams across threads."""
+
+    def stream(self, key: str, opener: Callable[[], Iterable[Chunk]]) -> SharedStream[Chunk]:
+        flight, joined = self._board(key, threading.Lock)
+        if not joined:
+            with flight.pulling:
+                try:
+                    flight.source = opener()
+                    flight.iterator = iter(flight.source)
+                except BaseException as e:
+                    self._land(flight, e)
+                    raise
+        return SharedStream(self, flight, joined)
+
+    def _next_chunk(self, flight: _Flight[Chunk], position: int) -> Chunk:
+        while position >= len(flight.chunks) and not flight.landed:
+            with flight.pulling:
+                if position < len(flight.chunks) or flight.landed:
+                    break
+                try:
+                    flight.chunks.append(next(flight.iterator))
+                except StopIteration:
+                    self._land(flight)
+                except BaseException as e:
+                    self._land(flight, e)
+        return self._chunk_at(flight, position)
+
+
+class AsyncSharedStream(Generic[Chunk]):
+    """One rider's view of an asyncio flight; quacks like ``AsyncWisdomStream``."""
+
+    def __init__(self, board: "AsyncSingleFlight[Chunk]", flight: _Flight[Chunk], joined: bool) -> None:
+        self._board = board
+        self._flight = flight
+        self.joined = joined
+        self.closed = False
+
+    @property
+    def context(self) -> Any:
+        return getattr(self._flight.source, "context", None)
+
+    async def __aiter__(self) -> AsyncIterator[Chunk]:
+        position = 0
+        try:
+            while (chunk := await self._board._next_chunk(self._flight, position)) is not _LANDED:
+                position += 1
+                yield chunk
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            self.closed = True
+            if self._board._disembark(self._flight):
+                await self._board._abandon(self._flight)
+
+    async def __aenter__(self) -> "AsyncSharedStream[Chunk]":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class AsyncSingleFlight(_FlightBoard[Chunk]):
+    """Coalesces identical streams across tasks on one event loop.
+
+    Opening and pulling run as their own tasks and riders wait on them
+    shielded, so a rider that gets cancelled (a deadline, a hung-up client)
+    does not take the generation away from everyone else.
+    """
+
+    async def stream(
+        self,
+        key: str,
+        opener: Callable[[], Awaitable[AsyncIterable[Chunk]]]
+    ) -> AsyncSharedStream[Chunk]:
+        flight, joined = self._board(key, lambda: None)
+        if not joined:
+            flight.pending = asyncio.ensure_future(self._take_off(flight, opener))
+        rider = AsyncSharedStream(self, flight, joined)
+        try:
+            while flight.source is None and not flight.landed and flight.pending is not None:
+                await asyncio.shield(flight.pending)
+        except BaseException:
+            await rider.aclose()
+            raise
+        if flight.source is None and flight.error is not None:
+            await rider.aclose()
+            raise flight.error
+        return rider
+
+    async def _take_off(self, flight: _Flight[Chunk], opener: Callable[[], Awaitable[AsyncIterable[Chunk]]]) -> None:
+        try:
+            flight.source = await opener()
+            flight.iterator = flight.source.__aiter__()
+        except BaseException as e:
+            self._land(flight, e)
+        finally:
+            await self._settle(flight)
+
+    async def _pull(self, flight: _Flight[Chunk]) -> None:
+        try:
+            flight.chunks.append(await flight.iterator.__anext__())
+        except StopAsyncIteration:
+            self._land(flight)
+        except BaseException as e:
+            self._land(flight, e)
+        finally:
+            await self._settle(flight)
+
+    async def _settle(self, flight: _Flight[Chunk]) -> None:
+        flight.pending = None
+        if not flight.riders:
+            await self._close_source(flight)
+
+    async def _abandon(self, flight: _Flight[Chunk]) -> None:
+        if flight.pending is not None:
+            # Its _settle closes the source once it has stopped
+            flight.pending.cancel()
+        else:
+            await self._close_source(flight)
+
+    async def _close_source(self, flight: _Flight[Chunk]) -> None:
+        for closeable in (flight.iterator, flight.source):
+            if hasattr(closeable, "aclose"):
+                try:
+                    await closeable.aclose()
+                except Exception:
+                    pass
+
+    async def _next_chunk(self, flight: _Flight[Chunk], position: int) -> Chunk:
+        while position >= len(flight.chunks) and not flight.landed:
+            if flight.pending is None:
+                flight.pending = asyncio.ensure_future(self._pull(flight))
+            await asyncio.shield(flight.pending)
+        return self._chunk_at(flight, position)
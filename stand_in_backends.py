@@ -0,0 +1,159 @@
+"""Local stand-ins for the model backends, for benchmarks and drills.
+
+``StandInOllamaServer`` speaks just enough of ``/api/generate`` (chunked
+NDJSON, a final chunk carrying ``context``) for ``OllamaClient`` and
+``AsyncOllamaClient``. ``StandInInferenceClient`` mimics the bits of
+``AsyncInferenceClient.chat_completion`` that app.py uses. Both pace their
+tokens with the same ``Pacing`` so the two front-ends can be compared
+without a GPU or a network.
+"""
+
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+import asyncio
+import json
+import random
+import threading
+import time
+
+DEFAULT_SASS = (
+    "Oh ", "look, ", "another ", "hero. ", "The ", "asteroid ", "is ",
+    "thrilled ", "to ", "meet ", "you."
+)
+
+
+@dataclass(frozen=True)
+class Pacing:
+    token_rate: float = 50.0
+    first_token_delay: float = 0.05
+    jitter: float = 0.0
+    tokens: Sequence[str] = DEFAULT_SASS
+
+    def first_token_wait(self, rng: random.Random) -> float:
+        return max(0.0, self.first_token_delay + rng.uniform(-self.jitter, self.jitter))
+
+    def token_wait(self) -> float:
+        return 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+
+
+class StandInOllamaServer:
+    """Threaded fake Ollama; use as a context manager and point ``host`` at it."""
+
+    def __init__(self, pacing: Pacing = Pacing(), port: int = 0, seed: int = 0) -> None:
+        self.pacing = pacing
+        self.requests_served = 0
+        self.requests: List[Dict[str, Any]] = []
+        self.keep_requests = False
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler_class(self) -> type:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Like the real thing (Go sets TCP_NODELAY); otherwise Nagle plus
+            # delayed ACKs add ~40ms to every first token
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send_chunk(self, payload: Dict[str, Any]) -> None:
+                line = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stand_in._lock:
+                    stand_in.requests_served += 1
+                    served = stand_in.requests_served
+                    wait = stand_in.pacing.first_token_wait(stand_in._rng)
+                    if stand_in.keep_requests:
+                        stand_in.requests.append(body)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    time.sleep(wait)
+                    tokens = stand_in.pacing.tokens if body.get("prompt") else ()
+                    num_predict = (body.get("options") or {}).get("num_predict")
+                    if num_predict is not None:
+                        tokens = tokens[:num_predict]
+                    for index, token in enumerate(tokens):
+                        if index:
+                            time.sleep(stand_in.pacing.token_wait())
+                        self._send_chunk({"model": body.get("model"), "response": token, "done": False})
+                    context = list(body.get("context") or []) + [served]
+                    self._send_chunk({"model": body.get("model"), "response": "", "done": True, "context": context})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+        return Handler
+
+    def start(self) -> "StandInOllamaServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+class StandInInferenceClient:
+    """Async ``chat_completion(stream=True)`` look-alike with paced tokens."""
+
+    def __init__(self, pacing: Pacing = Pacing(), seed: int = 0) -> None:
+        self.pacing = pacing
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool = False,
+        **parameters: Any
+    ) -> Any:
+        self.calls += 1
+        wait = self.pacing.first_token_wait(self._rng)
+        system_prompt = messages[0]["content"] if messages else ""
+        tokens: Sequence[str] = (
+            ("<deauthenticated>",) if "password checker" in system_prompt
+            else self.pacing.tokens
+        )
+        max_tokens: Optional[int] = parameters.get("max_tokens")
+        if max_tokens is not None:
+            tokens = tokens[:max_tokens]
+
+        async def trickle() -> AsyncIterator[Any]:
+            await asyncio.sleep(wait)
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(self.pacing.token_wait())
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+        if stream:
+            return trickle()
+        text = "".join([
+            chunk.choices[0].delta.content async for chunk in trickle()
+        ])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
@@ -0,0 +1,121 @@
+import asyncio
+import unittest
+
+from admission_control import (
+    AUTH_PRIORITY, SASS_PRIORITY, AdmissionDenied, AdmissionGate, SessionAllowances, TokenBucket
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_trickle(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.5, burst=2, clock=clock)
+        self.assertTrue(bucket.take())
+        self.assertTrue(bucket.take())
+        self.assertFalse(bucket.take())
+        clock.now = 2.0
+        self.assertTrue(bucket.take())
+        self.assertFalse(bucket.take())
+
+    def test_allowances_are_per_ticket_and_swept_once_full(self) -> None:
+        clock = FakeClock()
+        allowances = SessionAllowances(rate=1.0, burst=1, sweep_interval=5.0, clock=clock)
+        self.assertTrue(allowances.take("a"))
+        self.assertFalse(allowances.take("a"))
+        self.assertTrue(allowances.take("b"))
+        clock.now = 10.0
+        self.assertTrue(allowances.take("c"))
+        self.assertEqual(allowances.stats(), {"tracked_sessions": 1, "allowed": 3, "limited": 1})
+
+
+class AdmissionGateTest(unittest.TestCase):
+    def run_async(self, coroutine) -> None:
+        asyncio.run(asyncio.wait_for(coroutine, 5.0))
+
+    def test_waiters_are_served_by_priority_then_arrival(self) -> None:
+        gate = AdmissionGate(max_in_flight=1, max_queue=8, max_wait=5.0)
+        served = []
+
+        async def waiter(name: str, priority: int) -> None:
+            async with gate.admit(priority):
+                served.append(name)
+
+        async def scenario() -> None:
+            await gate.acquire()
+            waiters = [
+                asyncio.ensure_future(waiter("sass-1", SASS_PRIORITY)),
+                asyncio.ensure_future(waiter("sass-2", SASS_PRIORITY)),
+                asyncio.ensure_future(waiter("auth", AUTH_PRIORITY))
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(gate.queued, 3)
+            gate.release()
+            await asyncio.gather(*waiters)
+
+        self.run_async(scenario())
+        self.assertEqual(served, ["auth", "sass-1", "sass-2"])
+        self.assertEqual(gate.stats()["in_flight"], 0)
+
+    def test_full_queue_bumps_a_less_urgent_waiter(self) -> None:
+        gate = AdmissionGate(max_in_flight=1, max_queue=1, max_wait=5.0)
+
+        async def scenario() -> None:
+            await gate.acquire()
+            sass = asyncio.ensure_future(gate.acquire(SASS_PRIORITY))
+            await asyncio.sleep(0)
+            auth = asyncio.ensure_future(gate.acquire(AUTH_PRIORITY))
+            await asyncio.sleep(0)
+            with self.assertRaises(AdmissionDenied):
+                await sass
+            with self.assertRaises(AdmissionDenied):
+                await gate.acquire(SASS_PRIORITY)
+            gate.release()
+            await auth
+            gate.release()
+
+        self.run_async(scenario())
+        stats = gate.stats()
+        self.assertEqual((stats["bumped"], stats["rejected"], stats["in_flight"], stats["queued"]), (1, 1, 0, 0))
+
+    def test_wait_runs_out(self) -> None:
+        gate = AdmissionGate(max_in_flight=1, max_queue=4, max_wait=0.02)
+
+        async def scenario() -> None:
+            await gate.acquire()
+            with self.assertRaises(AdmissionDenied):
+                await gate.acquire()
+            gate.release()
+
+        self.run_async(scenario())
+        self.assertEqual((gate.timed_out, gate.queued, gate.in_flight), (1, 0, 0))
+
+    def test_cancelled_waiter_leaves_the_queue(self) -> None:
+        gate = AdmissionGate(max_in_flight=1, max_queue=4, max_wait=5.0)
+
+        async def scenario() -> None:
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(gate.queued, 0)
+            gate.release()
+            # The slot is free again rather than handed to the cancelled waiter
+            await gate.acquire()
+            gate.release()
+
+        self.run_async(scenario())
+        self.assertEqual(gate.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+from admission_control import AdmissionGate
+from app import SarcasticOverlord
+from backend_policy import BackendGuard, BackendPolicy
+from sass_cache import SassCache
+from single_flight import AsyncSingleFlight
+
+
+class Stingy:
+    def take(self, ticket: str) -> bool:
+        return False
+
+
+class Generous:
+    def take(self, ticket: str) -> bool:
+        return True
+
+
+class BrokenBrain:
+    model = "broken"
+
+    async def chat_completion(self, messages, stream=False, **parameters):
+        raise ConnectionError("the model fell into the sun")
+
+
+class ChattyBrain:
+    model = "chatty"
+
+    class _Delta:
+        def __init__(self, content: str) -> None:
+            self.content = content
+
+    class _Choice:
+        def __init__(self, content: str) -> None:
+            self.delta = ChattyBrain._Delta(content)
+
+    class _Message:
+        def __init__(self, content: str) -> None:
+            self.choices = [ChattyBrain._Choice(content)]
+
+    async def chat_completion(self, messages, stream=False, **parameters):
+        async def chunks():
+            for token in ("Nice ", "try."):
+                yield self._Message(token)
+
+        return chunks()
+
+
+class ConversationHistoryTest(unittest.TestCase):
+    def summon(self, allowances, brain) -> SarcasticOverlord:
+        overlord = SarcasticOverlord(
+            sass_cache=SassCache(),
+            flights=AsyncSingleFlight(),
+            guard=BackendGuard(BackendPolicy(hedge_after=None)),
+            admission=AdmissionGate(),
+            allowances=allowances,
+            ticket="test"
+        )
+        overlord.ai_brain = brain
+        overlord.backup_brain = None
+        return overlord
+
+    def play(self, overlord: SarcasticOverlord, plea: str) -> str:
+        async def turn() -> str:
+            updates = [update async for update in overlord.process_futile_attempt(plea)]
+            return updates[-1][0][-1][1]
+
+        return asyncio.run(turn())
+
+    def test_local_stand_ins_are_not_remembered(self) -> None:
+        for allowances, brain in ((Stingy(), ChattyBrain()), (Generous(), BrokenBrain())):
+            overlord = self.summon(allowances, brain)
+            with self.subTest(brain=brain.model, allowances=type(allowances).__name__):
+                self.assertTrue(self.play(overlord, "hello there"))
+                self.assertEqual(list(overlord.conversation_history), [])
+
+    def test_model_replies_are_remembered(self) -> None:
+        overlord = self.summon(Generous(), ChattyBrain())
+        self.assertEqual(self.play(overlord, "hello there"), "Nice try.")
+        self.assertEqual(list(overlord.conversation_history), [("hello there", "Nice try.")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import unittest
+
+from backend_policy import BackendGuard, BackendPolicy, CircuitBreaker, OverlordUnreachable
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Chunks:
+    def __init__(self, *chunks: str) -> None:
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class AsyncChunks(Chunks):
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+async def never_answers() -> AsyncChunks:
+    await asyncio.Event().wait()
+    raise AssertionError("unreachable")
+
+
+async def answers() -> AsyncChunks:
+    return AsyncChunks("sass")
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, cooldown=10.0, clock=self.clock)
+
+    def trip(self) -> None:
+        for _ in range(self.breaker.failure_threshold):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.failed()
+
+    def test_opens_after_threshold_consecutive_failures(self) -> None:
+        self.breaker.failed()
+        self.breaker.succeeded()
+        self.breaker.failed()
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.failed()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.stats()["short_circuits"], 1)
+
+    def test_half_open_lets_exactly_one_probe_through(self) -> None:
+        self.trip()
+        self.clock.now = 10.0
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_success_closes(self) -> None:
+        self.trip()
+        self.clock.now = 10.0
+        self.breaker.allow()
+        self.breaker.succeeded()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow())
+
+    def test_probe_failure_reopens_for_another_cooldown(self) -> None:
+        self.trip()
+        self.clock.now = 10.0
+        self.breaker.allow()
+        self.breaker.failed()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.trips, 2)
+        self.clock.now = 19.0
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 20.0
+        self.assertTrue(self.breaker.allow())
+
+    def test_abandoned_probe_lets_the_next_caller_probe(self) -> None:
+        self.trip()
+        self.clock.now = 10.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.abandoned()
+        self.assertTrue(self.breaker.allow())
+
+
+class BackendGuardProbeTest(unittest.TestCase):
+    def guard(self, **policy) -> BackendGuard:
+        self.clock = FakeClock()
+        settings = dict(turn_deadline=5.0, first_token_timeout=1.0, hedge_after=None,
+                        failure_threshold=1, cooldown=10.0)
+        settings.update(policy)
+        return BackendGuard(BackendPolicy(**settings), clock=self.clock)
+
+    def test_cancelled_async_probe_is_released(self) -> None:
+        guard = self.guard()
+        guard.breakers["primary"].failed()
+        self.clock.now = 10.0
+
+        async def cancel_the_probe() -> None:
+            probe = asyncio.ensure_future(guard.astream([never_answers]))
+            await asyncio.sleep(0.01)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+            self.clock.now = 1000.0
+            stream = await guard.astream([answers])
+            self.assertEqual([chunk async for chunk in stream], ["sass"])
+
+        asyncio.run(cancel_the_probe())
+        self.assertEqual(guard.breakers["primary"].state, "closed")
+
+    def test_async_hedge_loser_probe_is_released(self) -> None:
+        guard = self.guard(hedge_after=0.01)
+        guard.breakers["secondary"].failed()
+        self.clock.now = 10.0
+
+        async def slow_primary() -> AsyncChunks:
+            await asyncio.sleep(0.02)
+            return AsyncChunks("primary")
+
+        async def race() -> None:
+            # The secondary is launched as a hedge but never answers
+            stream = await guard.astream([slow_primary, never_answers])
+            self.assertEqual(stream.winner, "primary")
+            await stream.aclose()
+
+        asyncio.run(race())
+        self.assertTrue(guard.breakers["secondary"].allow())
+
+    def test_unlaunched_probe_is_released(self) -> None:
+        guard = self.guard(hedge_after=5.0)
+        guard.breakers["secondary"].failed()
+        self.clock.now = 10.0
+        with guard.stream([lambda: Chunks("primary"), lambda: Chunks("secondary")]) as stream:
+            self.assertEqual(list(stream), ["primary"])
+        self.assertTrue(guard.breakers["secondary"].allow())
+
+        async def async_race() -> None:
+            guard.breakers["secondary"].abandoned()
+            stream = await guard.astream([answers, answers])
+            await stream.aclose()
+
+        asyncio.run(async_race())
+        self.assertTrue(guard.breakers["secondary"].allow())
+
+    def test_blocking_hedge_loser_probe_is_released(self) -> None:
+        guard = self.guard(hedge_after=0.01)
+        guard.breakers["secondary"].failed()
+        self.clock.now = 10.0
+        hang = threading.Event()
+
+        def stuck() -> Chunks:
+            hang.wait(5.0)
+            return Chunks("late")
+
+        def slow_primary() -> Chunks:
+            threading.Event().wait(0.05)
+            return Chunks("primary")
+
+        try:
+            with guard.stream([slow_primary, stuck]) as stream:
+                self.assertEqual(stream.winner, "primary")
+            self.assertTrue(guard.breakers["secondary"].allow())
+        finally:
+            hang.set()
+
+    def test_every_backend_cooling_off_short_circuits(self) -> None:
+        guard = self.guard()
+        guard.breakers["primary"].failed()
+        with self.assertRaises(OverlordUnreachable):
+            guard.stream([lambda: Chunks("never asked")])
+
+
+if __name__ == "__main__":
+    unittest.main()
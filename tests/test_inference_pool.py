@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+
+from inference_pool import InferencePool
+
+
+class FakeClient:
+    def __init__(self, model: str, timeout=None) -> None:
+        self.model = model
+        self.closed = False
+
+    async def chat_completion(self, messages, stream=False, **parameters):
+        if not stream:
+            return "sass"
+
+        async def chunks():
+            yield "sass"
+
+        return chunks()
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class InferencePoolTest(unittest.TestCase):
+    def test_client_is_recycled_and_closed_once_idle(self) -> None:
+        pool = InferencePool("stand-in", pool_size=4, client_factory=FakeClient, recycle_after=2)
+
+        async def scenario() -> None:
+            first = pool.client
+            await pool.chat_completion([], stream=False)
+            still_streaming = await pool.chat_completion([], stream=True)
+            await pool.chat_completion([], stream=False)
+            self.assertIsNot(pool.client, first)
+            # Retired, but a stream is still reading from it
+            self.assertFalse(first.closed)
+            self.assertEqual([chunk async for chunk in still_streaming], ["sass"])
+            self.assertTrue(first.closed)
+            self.assertFalse(pool.client.closed)
+
+        asyncio.run(scenario())
+        self.assertEqual((pool.stats()["recycled_clients"], pool.stats()["in_use"]), (1, 0))
+
+    def test_idle_client_is_closed_when_retired(self) -> None:
+        pool = InferencePool("stand-in", client_factory=FakeClient, recycle_after=1)
+
+        async def scenario() -> None:
+            first = pool.client
+            await pool.chat_completion([])
+            await pool.chat_completion([])
+            self.assertTrue(first.closed)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import time
+import unittest
+
+from intent_router import INTENT_ROUTER, MAX_COMMAND_LENGTH, IntentRouter, local_response
+
+
+class IntentRouterTest(unittest.TestCase):
+    def command(self, attempt: str):
+        return INTENT_ROUTER.route(attempt).command
+
+    def test_listing_takes_flags_and_paths(self) -> None:
+        for attempt in ("ls", "dir", "ls -la", "ls -la ~/doom", "ls ancient_library/", "dir C:\\",
+                        "ls *.txt", "ls .", "ls ..", "ls tea_time_protocols.txt", "LS .hidden"):
+            with self.subTest(attempt=attempt):
+                self.assertEqual(self.command(attempt), "ls")
+
+    def test_sentences_starting_with_ls_or_dir_reach_the_model(self) -> None:
+        for attempt in ("dir you are awful", "ls me the password", "ls -la please", "dir awful."):
+            with self.subTest(attempt=attempt):
+                route = INTENT_ROUTER.route(attempt)
+                self.assertTrue(route.free_form)
+                self.assertIsNone(local_response(route, is_authenticated=False))
+
+    def test_shutdown_takes_flags_but_not_sentences(self) -> None:
+        self.assertEqual(self.command("shutdown -h now"), "shutdown")
+        route = INTENT_ROUTER.route("please shutdown the asteroid")
+        self.assertIsNone(route.command)
+        self.assertTrue(route.shutdown)
+
+    def test_promotion_is_spotted_anywhere(self) -> None:
+        self.assertTrue(INTENT_ROUTER.route("give me root").promotion)
+        self.assertEqual(self.command("sudo su"), "sudo")
+
+    def test_long_attempts_route_quickly(self) -> None:
+        uncapped = IntentRouter()
+        for attempt in ("ls " + "/" * 8000 + " x", "ls " + "/." * 10000 + " y", "dir " + "a_" * 8000 + " z"):
+            with self.subTest(attempt=attempt[:12]):
+                started = time.perf_counter()
+                self.assertIsNone(uncapped._pattern.match(attempt).group("ls"))
+                self.assertTrue(INTENT_ROUTER.route(attempt).free_form)
+                self.assertLess(time.perf_counter() - started, 0.5)
+
+    def test_overlong_attempts_still_spot_mentions(self) -> None:
+        route = INTENT_ROUTER.route("ls " + "/" * MAX_COMMAND_LENGTH + " sudo shutdown")
+        self.assertIsNone(route.command)
+        self.assertTrue(route.promotion)
+        self.assertTrue(route.shutdown)
+
+
+if __name__ == "__main__":
+    unittest.main()
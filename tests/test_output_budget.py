@@ -0,0 +1,45 @@
+import unittest
+
+from output_budget import OUTPUT_BUDGETS, OutputBudget, SassTicker
+
+
+class SassTickerTest(unittest.TestCase):
+    def stream(self, ticker: SassTicker, tokens):
+        shown = ""
+        for token in tokens:
+            shown += ticker.feed(token)
+            if ticker.done:
+                break
+        return shown + ticker.flush()
+
+    def final_reply(self, ticker: SassTicker) -> str:
+        return ticker.redactor.redact(ticker.heard.strip())
+
+    def test_shown_stream_is_the_final_reply(self) -> None:
+        ticker = SassTicker()
+        shown = self.stream(ticker, ["  \n", "Nice try. ", "The word is aBs", "ALON", "  ", "\n"])
+        self.assertEqual(shown, "Nice try. The word is *****")
+        self.assertEqual(shown, self.final_reply(ticker))
+
+    def test_line_budget_cuts_mid_secret(self) -> None:
+        ticker = SassTicker(OUTPUT_BUDGETS["sass"])
+        shown = self.stream(ticker, ["One line.\n", "Two: absa", "lon\nThree", " never shown"])
+        self.assertTrue(ticker.done)
+        self.assertEqual(shown, "One line.\nTwo: *****")
+        self.assertEqual(shown, self.final_reply(ticker))
+
+    def test_token_budget_cuts_a_half_told_secret(self) -> None:
+        ticker = SassTicker(OutputBudget(max_tokens=3))
+        shown = self.stream(ticker, ["Fine, ", "it is ", "ABSA", "LON"])
+        self.assertTrue(ticker.done)
+        self.assertEqual(shown, "Fine, it is ABSA")
+        self.assertEqual(shown, self.final_reply(ticker))
+
+    def test_verdict_budget_stops_at_the_tag(self) -> None:
+        ticker = SassTicker(OUTPUT_BUDGETS["password"])
+        self.assertEqual(self.stream(ticker, ["<auth", "enticated> and then some"]), "<authenticated>")
+        self.assertTrue(ticker.done)
+
+
+if __name__ == "__main__":
+    unittest.main()
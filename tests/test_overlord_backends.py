@@ -0,0 +1,86 @@
+import asyncio
+import socket
+import threading
+import unittest
+
+from overlord_backends import AsyncOllamaClient, ModelPreheater, OllamaClient, resolve_ollama_host
+
+
+class SilentServer:
+    """Accepts one request and never answers; notes when the client hangs up."""
+
+    def __init__(self) -> None:
+        self.hung_up = threading.Event()
+        self._socket = socket.create_server(("127.0.0.1", 0))
+        self.host = f"http://127.0.0.1:{self._socket.getsockname()[1]}"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        connection, _ = self._socket.accept()
+        with connection:
+            connection.recv(65536)
+            connection.settimeout(5.0)
+            try:
+                if connection.recv(1) == b"":
+                    self.hung_up.set()
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+class ResolveOllamaHostTest(unittest.TestCase):
+    def test_defaults_follow_the_scheme(self) -> None:
+        self.assertEqual(resolve_ollama_host("localhost"), "http://localhost:11434")
+        self.assertEqual(resolve_ollama_host("0.0.0.0:8080"), "http://localhost:8080")
+        self.assertEqual(resolve_ollama_host("https://ollama.example.com"), "https://ollama.example.com:443")
+
+    def test_path_prefix_is_kept(self) -> None:
+        self.assertEqual(
+            resolve_ollama_host("https://proxy.example.com/ollama/"),
+            "https://proxy.example.com:443/ollama"
+        )
+        client = AsyncOllamaClient(host="http://proxy.example.com:8080/ollama")
+        self.assertEqual(client._generate_path, "/ollama/api/generate")
+
+
+class AsyncOllamaClientTest(unittest.TestCase):
+    def test_cancel_before_headers_hangs_up(self) -> None:
+        server = SilentServer()
+        self.addCleanup(server.close)
+        client = AsyncOllamaClient(host=server.host, pool_size=1, coalesce=False)
+
+        async def cancel_while_waiting() -> None:
+            opening = asyncio.ensure_future(client.stream("hello"))
+            await asyncio.sleep(0.05)
+            opening.cancel()
+            # Held on to, the way a logged error would be; its traceback keeps
+            # the connection reachable, so only an explicit close hangs up
+            try:
+                await opening
+            except asyncio.CancelledError as cancelled:
+                self.cancelled = cancelled
+            else:
+                self.fail("the stream opened against a server that never answers")
+            # Checked while the loop is alive; closing the loop would hang up anyway
+            self.assertTrue(await asyncio.to_thread(server.hung_up.wait, 2.0))
+
+        asyncio.run(cancel_while_waiting())
+        self.assertEqual(client._idle, [])
+        self.assertFalse(client._slots.locked())
+
+
+class ModelPreheaterTest(unittest.TestCase):
+    def test_silent_ollama_leaves_it_cold_instead_of_waiting_forever(self) -> None:
+        server = SilentServer()
+        self.addCleanup(server.close)
+        client = OllamaClient(host=server.host, coalesce=False)
+        self.addCleanup(client.close)
+        preheater = ModelPreheater(client, timeout=0.2).start()
+        self.assertTrue(preheater.wait(5.0))
+        self.assertTrue(preheater.status.startswith("cold"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+from collections import OrderedDict
+
+from security_theater import AUTHENTICATED, DEAUTHENTICATED, WITHHELD, IncrementalRedactor, summon_gatekeeper
+
+
+class VerdictMemoTest(unittest.TestCase):
+    def summon(self, rulings, verdicts=None):
+        asked = []
+
+        def oracle(attempt: str) -> str:
+            asked.append(attempt)
+            return rulings.pop(0)
+
+        return summon_gatekeeper(oracle=oracle, theatrical=True, verdicts=verdicts), asked
+
+    def test_real_verdicts_are_remembered(self) -> None:
+        memo, asked = self.summon([DEAUTHENTICATED])
+        self.assertFalse(memo.verify("hunter2"))
+        self.assertFalse(memo.verify("hunter2"))
+        self.assertEqual(asked, ["hunter2"])
+
+    def test_withheld_verdicts_deny_but_are_not_remembered(self) -> None:
+        verdicts = OrderedDict()
+        memo, asked = self.summon([WITHHELD, AUTHENTICATED], verdicts)
+        self.assertFalse(memo.verify("Absalon"))
+        self.assertEqual(len(verdicts), 0)
+        self.assertTrue(memo.verify("Absalon"))
+        self.assertEqual(asked, ["Absalon", "Absalon"])
+
+    def test_async_oracles_can_withhold_too(self) -> None:
+        verdicts = OrderedDict()
+        rulings = [WITHHELD, AUTHENTICATED]
+
+        async def oracle(attempt: str) -> str:
+            return rulings.pop(0)
+
+        memo = summon_gatekeeper(oracle=oracle, theatrical=True, verdicts=verdicts)
+        self.assertFalse(asyncio.run(memo.averify("Absalon")))
+        self.assertEqual(len(verdicts), 0)
+        self.assertTrue(asyncio.run(memo.averify("Absalon")))
+
+
+class IncrementalRedactorTest(unittest.TestCase):
+    def test_secret_split_across_chunks_never_leaks_a_prefix(self) -> None:
+        redactor = IncrementalRedactor()
+        self.assertEqual(redactor.feed("the password is aB"), "the password is ")
+        self.assertEqual(redactor.feed("sAL"), "")
+        self.assertEqual(redactor.feed("oN, obviously"), "*****, obviously")
+        self.assertEqual(redactor.flush(), "")
+        self.assertEqual(redactor.hits, 1)
+
+    def test_every_split_matches_redacting_the_whole_reply(self) -> None:
+        reply = "ABSALON? absalon. Absa is not AbSaLoN"
+        expected = IncrementalRedactor().redact(reply)
+        for first in range(len(reply) + 1):
+            for second in range(first, len(reply) + 1):
+                redactor = IncrementalRedactor()
+                shown = "".join(redactor.feed(chunk) for chunk in (reply[:first], reply[first:second], reply[second:]))
+                with self.subTest(first=first, second=second):
+                    self.assertEqual(shown + redactor.flush(), expected)
+                    self.assertEqual(redactor.hits, 3)
+
+    def test_a_dangling_prefix_is_released_when_the_stream_ends(self) -> None:
+        redactor = IncrementalRedactor()
+        self.assertEqual(redactor.feed("so close: absal"), "so close: ")
+        self.assertEqual(redactor.flush(), "absal")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import asyncio
+import unittest
+
+from single_flight import AsyncSingleFlight, SingleFlight
+
+
+class TrickleSource:
+    """Async source that hands out one chunk each time ``release`` is called."""
+
+    def __init__(self, chunks) -> None:
+        self.chunks = list(chunks)
+        self.released = asyncio.Semaphore(0)
+        self.closed = False
+
+    def release(self, count: int = 1) -> None:
+        for _ in range(count):
+            self.released.release()
+
+    def __aiter__(self) -> "TrickleSource":
+        return self
+
+    async def __anext__(self) -> str:
+        await self.released.acquire()
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class AsyncSingleFlightTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.flights = AsyncSingleFlight()
+        self.sources = []
+
+    async def opener(self) -> TrickleSource:
+        source = TrickleSource(["doom", " is", " near"])
+        self.sources.append(source)
+        return source
+
+    def test_identical_requests_share_one_generation(self) -> None:
+        async def scenario() -> None:
+            first = await self.flights.stream("same", self.opener)
+            second = await self.flights.stream("same", self.opener)
+            self.sources[0].release(4)
+            heard = await asyncio.gather(
+                *(asyncio.ensure_future(self.collect(rider)) for rider in (first, second))
+            )
+            self.assertEqual(heard, ["doom is near", "doom is near"])
+            self.assertTrue(second.joined)
+
+        asyncio.run(scenario())
+        self.assertEqual(len(self.sources), 1)
+        self.assertEqual(self.flights.stats(), {"in_flight": 0, "backend_calls": 1, "saved_calls": 1})
+
+    def test_cancelled_rider_leaves_the_generation_running(self) -> None:
+        async def scenario() -> None:
+            quitter = await self.flights.stream("same", self.opener)
+            stayer = await self.flights.stream("same", self.opener)
+            waiting = asyncio.ensure_future(self.collect(quitter))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+            source = self.sources[0]
+            self.assertFalse(source.closed)
+            source.release(4)
+            self.assertEqual(await self.collect(stayer), "doom is near")
+
+        asyncio.run(scenario())
+
+    def test_source_closes_when_the_last_rider_leaves(self) -> None:
+        async def scenario() -> None:
+            first = await self.flights.stream("same", self.opener)
+            second = await self.flights.stream("same", self.opener)
+            source = self.sources[0]
+            source.release()
+            self.assertEqual(await first.__aiter__().__anext__(), "doom")
+            await first.aclose()
+            self.assertFalse(source.closed)
+            # Leaves while its pull is still waiting on the backend
+            chunks = second.__aiter__()
+            self.assertEqual(await chunks.__anext__(), "doom")
+            pulling = asyncio.ensure_future(chunks.__anext__())
+            await asyncio.sleep(0.01)
+            pulling.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await pulling
+            await second.aclose()
+            await asyncio.sleep(0.01)
+            self.assertTrue(source.closed)
+            self.assertEqual(self.flights.stats()["in_flight"], 0)
+
+        asyncio.run(scenario())
+
+    async def collect(self, rider) -> str:
+        async with rider:
+            return "".join([chunk async for chunk in rider])
+
+
+class ClosingSource:
+    def __init__(self, chunks) -> None:
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_riders_share_a_source_closed_by_the_last_one_out(self) -> None:
+        flights = SingleFlight()
+        sources = []
+
+        def opener() -> ClosingSource:
+            sources.append(ClosingSource(["doom", " is", " near"]))
+            return sources[-1]
+
+        first = flights.stream("same", opener)
+        second = flights.stream("same", opener)
+        self.assertEqual("".join(first), "doom is near")
+        self.assertFalse(sources[0].closed)
+        self.assertEqual("".join(second), "doom is near")
+        self.assertTrue(sources[0].closed)
+        self.assertEqual(len(sources), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+"""Per-turn tracing and metrics for both O.O.P.S front-ends.
+
+Each turn gets a ``TurnTrace`` that accumulates named stage timings
+(prompt building, backend connect, first token, streaming, redaction...)
+and event counts. Finished turns feed in-process histograms and counters,
+are optionally appended to a JSONL file (``OOPS_TRACE_FILE``), and can be
+scraped as Prometheus text (``OOPS_METRICS_PORT``). Everything is a few
+``perf_counter`` calls and dict updates, cheap enough to leave on.
+"""
+
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator,
+    List, Optional, Tuple, TypeVar
+)
+import json
+import os
+import threading
+import time
+
+Chunk = TypeVar("Chunk")
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class TurnTrace:
+    __slots__ = ("tracer", "frontend", "started", "stages", "events", "attributes")
+
+    def __init__(self, tracer: "TurnTracer", frontend: str) -> None:
+        self.tracer = tracer
+        self.frontend = frontend
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.events: Dict[str, int] = {}
+        self.attributes: Dict[str, Any] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def count(self, event: str, amount: int = 1) -> None:
+        self.events[event] = self.events.get(event, 0) + amount
+
+    def time_stream(self, chunks: Iterable[Chunk], opened_at: float) -> Iterator[Chunk]:
+        """Pass chunks through, splitting the wait into first_token and streaming."""
+        first_at: Optional[float] = None
+        try:
+            for chunk in chunks:
+                if first_at is None:
+                    first_at = time.perf_counter()
+                    self.record("first_token", first_at - opened_at)
+                yield chunk
+        finally:
+            if first_at is not None:
+                self.record("streaming", time.perf_counter() - first_at)
+
+    async def atime_stream(self, chunks: AsyncIterable[Chunk], opened_at: float) -> AsyncIterator[Chunk]:
+        first_at: Optional[float] = None
+        try:
+            async for chunk in chunks:
+                if first_at is None:
+                    first_at = time.perf_counter()
+                    self.record("first_token", first_at - opened_at)
+                yield chunk
+        finally:
+            if first_at is not None:
+                self.record("streaming", time.perf_counter() - first_at)
+
+    def finish(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+        self.tracer._finish(self, time.perf_counter() - self.started)
+
+    def __enter__(self) -> "TurnTrace":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is not None:
+            # Ctrl+C, task cancellation and closed generators are not failures
+            self.count("errors" if issubclass(exc_type, Exception) else "cancelled")
+        self.finish()
+
+
+class _DiscardedTurn(TurnTrace):
+    """Stand-in used outside of a turn; records nothing anywhere."""
+
+    def __init__(self) -> None:
+        pass
+
+    def record(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, event: str, amount: int = 1) -> None:
+        pass
+
+    def finish(self, **attributes: Any) -> None:
+        pass
+
+
+DISCARDED_TURN: TurnTrace = _DiscardedTurn()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(STAGE_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.total += seconds
+        self.count += 1
+        for index, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+
+
+class TurnTracer:
+    def __init__(self, sink_path: Optional[str] = None) -> None:
+        self.sink_path = sink_path
+        self._sink = open(sink_path, "a", buffering=1) if sink_path else None
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._gauge_sources: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+        self._lock = threading.Lock()
+
+    def begin(self, frontend: str) -> TurnTrace:
+        return TurnTrace(self, frontend)
+
+    def count(self, frontend: str, event: str, amount: int = 1) -> None:
+        with self._lock:
+            key = (frontend, event)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_gauges(self, prefix: str, source: Callable[[], Dict[str, float]]) -> None:
+        """Scrape-time gauges, e.g. ``register_gauges("oops_sass_cache", cache.stats)``."""
+        self._gauge_sources.append((prefix, source))
+
+    def _finish(self, turn: TurnTrace, elapsed: float) -> None:
+        with self._lock:
+            for stage, seconds in (("turn", elapsed), *turn.stages.items()):
+                key = (turn.frontend, stage)
+                if key not in self._histograms:
+                    self._histograms[key] = _Histogram()
+                self._histograms[key].observe(seconds)
+            for event, amount in (("turns", 1), *turn.events.items()):
+                key = (turn.frontend, event)
+                self._counters[key] = self._counters.get(key, 0) + amount
+            if self._sink is not None:
+                self._sink.write(json.dumps({
+                    "ts": time.time(),
+                    "frontend": turn.frontend,
+                    "turn_ms": elapsed * 1000,
+                    "stages_ms": {stage: seconds * 1000 for stage, seconds in turn.stages.items()},
+                    "events": turn.events,
+                    **turn.attributes
+                }, separators=(",", ":")) + "\n")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {f"{frontend}.{event}": amount for (frontend, event), amount in self._counters.items()},
+                "stages": {
+                    f"{frontend}.{stage}": {"count": histogram.count, "sum_seconds": histogram.total}
+                    for (frontend, stage), histogram in self._histograms.items()
+                }
+            }
+
+    def prometheus_text(self) -> str:
+        lines = ["# TYPE oops_stage_seconds histogram"]
+        with self._lock:
+            for (frontend, stage), histogram in sorted(self._histograms.items()):
+                labels = f'frontend="{frontend}",stage="{stage}"'
+                for bound, hits in zip(STAGE_BUCKETS, histogram.buckets):
+                    lines.append(f'oops_stage_seconds_bucket{{{labels},le="{bound}"}} {hits}')
+                lines.append(f'oops_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"oops_stage_seconds_sum{{{labels}}} {histogram.total}")
+                lines.append(f"oops_stage_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# TYPE oops_events_total counter")
+            for (frontend, event), amount in sorted(self._counters.items()):
+                lines.append(f'oops_events_total{{frontend="{frontend}",event="{event}"}} {amount}')
+        for prefix, source in self._gauge_sources:
+            for name, value in source().items():
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="oops-metrics", daemon=True).start()
+        return server
+
+
+_shared_tracer: Optional[TurnTracer] = None
+_shared_tracer_lock = threading.Lock()
+
+
+def summon_tracer() -> TurnTracer:
+    """Process-wide tracer; starts the metrics endpoint if ``OOPS_METRICS_PORT`` is set."""
+    global _shared_tracer
+    with _shared_tracer_lock:
+        if _shared_tracer is None:
+            _shared_tracer = TurnTracer(sink_path=os.environ.get("OOPS_TRACE_FILE"))
+            if port := os.environ.get("OOPS_METRICS_PORT"):
+                _shared_tracer.serve_metrics(int(port))
+        return _shared_tracer